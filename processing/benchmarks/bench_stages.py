@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark for every stage of the converter.
+
+Makes a fake export with generate_export.py (or uses --input) and times
+each stage on its own: finding the sections, parsing them, picking the
+wanted posts, dates, titles, media paths, building posts, rendering, sorting and
+writing the page. Each stage is timed on fresh input (best of --repeat)
+and then run once more with tracemalloc to find its peak memory.
+
+Save the numbers with --save and check a later run against them with
+--baseline; the script exits with 1 when a stage got slower than
+--threshold allows, so regressions are caught before they ship.
+
+Run from the project folder, for example:
+    python3 processing/benchmarks/bench_stages.py --posts 5000 --save /tmp/before.json
+    python3 processing/benchmarks/bench_stages.py --posts 5000 --baseline /tmp/before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'scripts'))
+
+from bs4 import BeautifulSoup
+
+import create_fb_posts
+import image_size
+import media_index
+from blog_writer import PostStats, open_output
+from classifier import HEADER_CLASSES, get_post_classifier
+from config import BLOG_DESCRIPTION, BLOG_TITLE, FACEBOOK_USERNAME, REVERSE_CHRONOLOGICAL, SORT_MEMORY_MB
+from create_fb_posts import (PAGE_END, build_post, fix_image_paths, render_blog_header,
+                             render_page_head, render_post, render_stats)
+from dates import DateParser
+from external_sort import PostSorter
+from generate_export import generate_export
+from section_stream import FOOTER_DATE, iter_raw_sections, map_export, raw_headers, read_original_css, section_offsets
+from titles import TitleEngine, extract_first_sentence
+
+def parse(raw_sections):
+    return [BeautifulSoup(raw, 'html.parser').section for raw in raw_sections]
+
+def raw_title(section):
+    """The text a post title is made from (first sentence of the post, else the caption)"""
+    content = section.find('div', class_='_2pin')
+    if content is not None:
+        return extract_first_sentence(content.get_text())
+    caption = section.find('div', class_='_3-95')
+    return caption.get_text().strip() if caption is not None else "photos"
+
+class Stage:
+    """
+    One thing to measure. prepare() makes fresh input (not timed) and
+    run(data) does the work; items is how many posts/sections it handles.
+    """
+
+    def __init__(self, name, prepare, run, items):
+        self.name = name
+        self.prepare = prepare
+        self.run = run
+        self.items = items
+
+def make_stages(input_file, output_dir):
+    """All stages, in the order the converter runs them"""
+    raw_sections = [raw.decode('utf-8') for _, _, raw in iter_raw_sections(input_file)]
+    original_css = read_original_css(input_file)
+    post_classifier = get_post_classifier()
+
+    wanted_raw = [raw for raw, section in zip(raw_sections, parse(raw_sections))
+                  if post_classifier.classify_section(section)]
+    titles = [raw_title(section) for section in parse(wanted_raw)]
+    footer_dates = [date for raw in wanted_raw for date in FOOTER_DATE.findall(raw.encode('utf-8'))[:1]]
+    footer_dates = [date.decode('utf-8') for date in footer_dates]
+
+    built = [(build_post(section), raw) for section, raw in zip(parse(wanted_raw), wanted_raw)]
+    built = [(post, raw) for post, raw in built if post]
+    posts = [post for post, _ in built]
+    output_file = os.path.join(output_dir, 'bench-page.html')
+
+    def write(posts):
+        stats = PostStats()
+        with open_output(output_file) as out:
+            out.write(render_page_head(BLOG_TITLE, original_css))
+            out.write(render_blog_header(BLOG_TITLE, BLOG_DESCRIPTION))
+            for post in posts:
+                out.write(post.html)
+                stats.add(post)
+            out.write(render_stats(stats))
+            out.write(PAGE_END)
+
+    def sort_posts(sorter):
+        with sorter:
+            for post in posts:
+                sorter.add(post)
+            sorter.finish()
+            return sum(1 for _ in sorter.sorted_posts())
+
+    def prescan(path):
+        # Offsets and header lines of every section, through the memory map (no parsing)
+        with map_export(path) as data:
+            return [raw_headers(data[start:end].decode('utf-8', 'replace'), HEADER_CLASSES)
+                    for start, end in section_offsets(data)]
+
+    def full_run(_):
+        # The whole converter on the fake export, without the build cache
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_fb_posts.create_facebook_blog([input_file], os.path.join(output_dir, 'bench-full.html'))
+
+    def full_run_serial(_):
+        # The same on one core, to see what the worker processes gain
+        workers = create_fb_posts.MAX_WORKERS
+        create_fb_posts.MAX_WORKERS = 1
+        try:
+            full_run(_)
+        finally:
+            create_fb_posts.MAX_WORKERS = workers
+
+    sections = len(raw_sections)
+    return [
+        Stage('scan', lambda: input_file,
+              lambda path: [raw for _, _, raw in iter_raw_sections(path)], sections),
+        Stage('prescan', lambda: input_file, prescan, sections),
+        Stage('parse', lambda: raw_sections, parse, sections),
+        Stage('classify', lambda: parse(raw_sections),
+              lambda found: [post_classifier.classify_section(section) for section in found], sections),
+        Stage('dates', lambda: DateParser(),
+              lambda parser: parser.parse_many(footer_dates), len(footer_dates)),
+        Stage('clean_title', lambda: TitleEngine(),
+              lambda engine: [engine.title_and_slug(title) for title in titles], len(titles)),
+        Stage('fix_image_paths', lambda: parse(wanted_raw),
+              lambda found: [fix_image_paths(section) for section in found], len(wanted_raw)),
+        Stage('build_post', lambda: parse(wanted_raw),
+              lambda found: [build_post(section) for section in found], len(wanted_raw)),
+        # build_post empties its section, so render a freshly parsed copy
+        Stage('render', lambda: [(post, section) for (post, _), section in zip(built, parse([raw for _, raw in built]))],
+              lambda pairs: [render_post(post, section) for post, section in pairs], len(built)),
+        Stage('sort', lambda: PostSorter(SORT_MEMORY_MB * 1024 * 1024, REVERSE_CHRONOLOGICAL),
+              sort_posts, len(posts)),
+        # The same with a tiny memory budget, so runs are written to disk and merged
+        Stage('sort_spill', lambda: PostSorter(64 * 1024, REVERSE_CHRONOLOGICAL),
+              sort_posts, len(posts)),
+        Stage('write', lambda: posts, write, len(posts)),
+        Stage('full_run', lambda: None, full_run, sections),
+        Stage('full_run_serial', lambda: None, full_run_serial, sections),
+    ]
+
+def measure(stage, repeat, memory=True):
+    """Best time of repeat runs, and the peak memory of one more run"""
+    best = None
+    for _ in range(repeat):
+        data = stage.prepare()
+        start = time.perf_counter()
+        stage.run(data)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    peak = None
+    if memory:
+        data = stage.prepare()
+        tracemalloc.start()
+        stage.run(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'seconds': best,
+        'items': stage.items,
+        'us_per_item': best / stage.items * 1e6 if stage.items else 0.0,
+        'peak_kb': peak // 1024 if peak is not None else None,
+    }
+
+def peak_rss_kb():
+    """Highest memory use of this process so far (None where unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def compare(results, baseline, threshold):
+    """Names of the stages that got slower than the baseline by more than threshold"""
+    slower = []
+    for name, now in results['stages'].items():
+        before = baseline.get('stages', {}).get(name)
+        if not before or not before['us_per_item']:
+            continue
+        change = now['us_per_item'] / before['us_per_item'] - 1
+        if change > threshold:
+            slower.append((name, change))
+    return slower
+
+def print_results(results):
+    print(f"{results['posts']} sections, best of {results['repeat']}")
+    print(f"{'stage':<16} {'total':>10} {'per item':>12} {'peak memory':>14}")
+    for name, stage in results['stages'].items():
+        peak = f"{stage['peak_kb']:,} KB" if stage['peak_kb'] is not None else "-"
+        print(f"{name:<16} {stage['seconds']:>9.3f}s {stage['us_per_item']:>9.1f} µs {peak:>14}")
+    if results['peak_rss_kb']:
+        print(f"Process peak memory: {results['peak_rss_kb']:,} KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the converter")
+    parser.add_argument('--posts', type=int, default=2000, help="sections in the fake export")
+    parser.add_argument('--input', help="use this export instead of a fake one")
+    parser.add_argument('--media', action='store_true', help="also make photo files, so photo sizes are read")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', help="comma-separated stages to run (default: all)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc runs")
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON file from an earlier --save to compare with")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown per item (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # The build cache would hide the real work
+    create_fb_posts.BUILD_CACHE = False
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Keep the post database and the newest-post record (for --since-last-run)
+        # away from the real ones
+        create_fb_posts.POST_INDEX_FILE = os.path.join(work_dir, 'posts.sqlite')
+        create_fb_posts.CACHE_DIR = work_dir
+        input_file = args.input
+        if not input_file:
+            input_file = os.path.join(work_dir, 'your_posts__check_ins__photos_and_videos_1.html')
+            media_dir = os.path.join(work_dir, 'media') if args.media else None
+            generate_export(input_file, args.posts, username=FACEBOOK_USERNAME, media_dir=media_dir)
+            if media_dir:
+                image_size.build_dimension_index(media_dir=media_dir, cache_dir=work_dir)
+                media_index.build_media_index(media_dir=media_dir, cache_dir=work_dir)
+
+        stages = make_stages(input_file, work_dir)
+        if args.stages:
+            wanted = args.stages.split(',')
+            stages = [stage for stage in stages if stage.name in wanted]
+
+        results = {
+            'posts': max((stage.items for stage in stages), default=0),
+            'repeat': args.repeat,
+            'stages': {stage.name: measure(stage, args.repeat, not args.no_memory) for stage in stages},
+        }
+        results['peak_rss_kb'] = peak_rss_kb()
+
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        slower = compare(results, baseline, args.threshold)
+        for name, change in slower:
+            print(f"⚠️  {name} is {change:.0%} slower per item than the baseline")
+        if slower:
+            sys.exit(1)
+        print("No stage got slower than the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""
+Microbenchmark for post titles.
+
+Compares the old way of cleaning titles (one re.sub per clutter spelling,
+then separate slug regexes) with the precompiled TitleEngine, with and
+without its memory of repeated captions. Prints the cost per post.
+
+Run from the project folder:
+    python3 processing/benchmarks/bench_titles.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from config import FACEBOOK_CLUTTER_TERMS, MAX_TITLE_LENGTH
+from titles import TitleEngine, extract_first_sentence
+
+# Roughly what a real export looks like: lots of repeated album captions
+SAMPLE_TITLES = [
+    "Mobile uploads", "Timeline photos", "Cover photos", "Profile pictures",
+    "Mobile-uploads Mobile uploads", "Timeline-photos - Beach day",
+]
+
+def make_titles(count, seed=1):
+    """Mix of repeated captions and unique first sentences"""
+    rng = random.Random(seed)
+    titles = []
+    for number in range(count):
+        if rng.random() < 0.4:
+            titles.append(rng.choice(SAMPLE_TITLES))
+        else:
+            titles.append(extract_first_sentence(f"Post {number}: lovely walk by the sea with the dog! More soon."))
+    return titles
+
+def legacy_title_and_slug(title):
+    """The old per-post code path, kept here for comparison"""
+    for term in FACEBOOK_CLUTTER_TERMS:
+        for pattern in [term, term.replace(' ', '-'), term.replace('-', ' ')]:
+            title = re.sub(re.escape(pattern), '', title, flags=re.IGNORECASE)
+    title = re.sub(r'(Mobile[-\s]*uploads?\s*)+', '', title, flags=re.IGNORECASE)
+    title = re.sub(r'^[-\s_]+|[-\s_]+$', '', title)
+    title = re.sub(r'[-\s_]{2,}', '-', title)
+    if len(title) > MAX_TITLE_LENGTH:
+        title = title[:MAX_TITLE_LENGTH].rsplit(' ', 1)[0] + '...'
+    safe_title = re.sub(r'[^\w\s-]', '', title).strip()
+    safe_title = re.sub(r'[-\s]+', '-', safe_title)
+    return title, safe_title
+
+def report(name, seconds, count):
+    print(f"{name:<28} {seconds / count * 1e6:8.2f} µs/post")
+
+def main(count=20000, repeat=5):
+    titles = make_titles(count)
+
+    legacy = min(timeit.repeat(lambda: [legacy_title_and_slug(t) for t in titles], number=1, repeat=repeat))
+    # An engine with no memory at all shows the cost of the single-pass pattern alone
+    forgetful = TitleEngine(cache_size=0)
+    uncached = min(timeit.repeat(lambda: [forgetful.title_and_slug(t) for t in titles], number=1, repeat=repeat))
+
+    def memoized():
+        fresh = TitleEngine()
+        return [fresh.title_and_slug(t) for t in titles]
+    cached = min(timeit.repeat(memoized, number=1, repeat=repeat))
+
+    print(f"{count} titles, best of {repeat}")
+    report("legacy re.sub loop", legacy, count)
+    report("TitleEngine (no memory)", uncached, count)
+    report("TitleEngine (memoized)", cached, count)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""
+Makes a fake Facebook export for testing and benchmarks.
+
+The file looks like a real "your_posts__check_ins__photos_and_videos_1.html":
+<section class="_a6-g"> posts with _2ph_/_a6-h headers, _2pin post text,
+_3-95 captions and album labels, media links and _a72d date footers. It
+also contains other people's posts and shares, which the converter should
+skip. Nothing in it comes from a real account.
+
+Run from the project folder, for example:
+    python3 processing/benchmarks/generate_export.py --posts 10000 --output /tmp/fake_export.html
+    python3 processing/benchmarks/generate_export.py --posts 200 --output /tmp/fake/export.html --media-dir /tmp/fake/media
+"""
+
+import argparse
+import os
+import random
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+ALBUMS = ["Mobile uploads", "Timeline photos", "Cover photos", "Profile pictures"]
+
+WORDS = (
+    "morning coffee beach walk dog garden rain sunshine friends family dinner "
+    "holiday weekend birthday cake mountains city lights book music train "
+    "market flowers autumn winter spring summer lovely great finally today"
+).split()
+
+STYLE = """
+._a6-g{border-bottom:1px solid #ccc;padding:12px}._a6-h{font-weight:bold}
+._2ph_{padding:4px}._2pin{margin:8px 0}._3-95{color:#444}._a72d{font-size:12px}
+._a6_o{max-width:100%}._a705{margin:0 auto}._a6-p{padding:4px}._a6-i{color:#333}
+.unused-rule{color:red}.another-unused{margin:0}
+"""
+
+def sentence(rng, min_words=4, max_words=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return ' '.join(words).capitalize() + rng.choice(['.', '!', '?', '.'])
+
+def facebook_date(when):
+    """Date the way Facebook writes it: "Aug 09, 2025 9:48:19 am" """
+    hour = when.hour % 12 or 12
+    am_pm = "am" if when.hour < 12 else "pm"
+    return f"{MONTHS[when.month - 1]} {when.day:02d}, {when.year} {hour}:{when.minute:02d}:{when.second:02d} {am_pm}"
+
+# An empty MP4 "ftyp" box, written for every video link
+VIDEO_PLACEHOLDER = b'\x00\x00\x00\x14ftypisom\x00\x00\x02\x00isom'
+
+def make_png(width, height):
+    """A small valid grey PNG of the given size"""
+    row = b'\x00' + b'\x80' * width
+    data = zlib.compress(row * height, 9)
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', data) + chunk(b'IEND', b'')
+
+def media_block(rng, post_number, photos, media_files):
+    """Links and <img> tags for a post's photos"""
+    album = rng.choice(["Mobileuploads_1", "Timelinephotos_2", "Coverphotos_3"])
+    parts = []
+    for photo in range(photos):
+        path = f"{album}/{post_number}_{photo}.png"
+        media_files.append(path)
+        link = f"your_facebook_activity/posts/media/{path}"
+        parts.append(f'<div class="_2pin"><a href="{link}"><img src="{link}" class="_a6_o" /></a></div>')
+    return ''.join(parts)
+
+def make_section(rng, number, when, username, media_files):
+    """HTML of one post section"""
+    kind = rng.random()
+    text = ""
+    caption = ""
+    photos = 0
+
+    if kind < 0.25:
+        header = f"{username} updated her status."
+        text = ' '.join(sentence(rng) for _ in range(rng.randint(1, 4)))
+    elif kind < 0.65:
+        photos = rng.randint(1, 4)
+        header = f"{username} added a new photo to the album {rng.choice(ALBUMS)}." if photos == 1 else f"{username} added {photos} new photos."
+        if rng.random() < 0.5:
+            text = sentence(rng)
+        elif rng.random() < 0.5:
+            caption = sentence(rng, 2, 8)
+    elif kind < 0.75:
+        header = f"{username} added a new video."
+        text = sentence(rng) if rng.random() < 0.5 else ""
+    elif kind < 0.9:
+        header = f"{rng.choice(['Sam Jones', 'Alex Lee', 'Kim Park'])} wrote on {username}'s timeline."
+        text = sentence(rng)
+    else:
+        header = f"{username} shared a link."
+        text = sentence(rng)
+
+    body = []
+    if text:
+        body.append(f'<div class="_2pin"><div>{text}</div><div>Updated {facebook_date(when)}</div></div>')
+    if photos:
+        body.append(media_block(rng, number, photos, media_files))
+        body.append(f'<div class="_3-95">{rng.choice(ALBUMS)}</div>')
+    if caption:
+        body.append(f'<div class="_3-95">{caption}</div>')
+    if header.endswith("a new video."):
+        media_files.append(f"videos/{number}.mp4")
+        video = f"your_facebook_activity/posts/media/videos/{number}.mp4"
+        body.append(f'<div class="_2pin"><video src="{video}" controls></video></div><div class="_3-95">Click for video</div>')
+
+    return (
+        f'<section class="_a6-g"><h2 class="_2ph_ _a6-h _a6-i">{header}</h2>'
+        f'<div class="_2ph_ _a6-p"><div>{"".join(body)}</div></div>'
+        f'<footer class="_a6-o"><div class="_a72d">{facebook_date(when)}</div></footer></section>\n'
+    )
+
+def generate_export(output_file, posts, seed=1, username="Ellie Ellie", media_dir=None):
+    """
+    Write a fake export with the given number of sections to output_file.
+    With media_dir, a file is also written for every media link: a small PNG
+    for each photo and a tiny placeholder for each video.
+    Returns the list of media paths referenced.
+    """
+    rng = random.Random(seed)
+    media_files = []
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+
+    # Newest first, like Facebook does
+    when = datetime(2024, 12, 31, 23, 0, 0)
+    with open(output_file, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Your posts</title><style>{STYLE}</style></head>')
+        f.write('<body class="_a6-g"><div class="_a705"><main class="_a706">\n')
+        for number in range(posts):
+            when -= timedelta(minutes=rng.randint(30, 60 * 48))
+            f.write(make_section(rng, number, when, username, media_files))
+        f.write('</main></div></body></html>\n')
+
+    if media_dir:
+        for path in media_files:
+            target = os.path.join(media_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                if path.endswith('.mp4'):
+                    # Only the start of an MP4 file; nothing reads the video itself
+                    f.write(VIDEO_PLACEHOLDER)
+                else:
+                    f.write(make_png(rng.choice([640, 800, 1024]), rng.choice([480, 600, 768])))
+
+    return media_files
+
+def main():
+    parser = argparse.ArgumentParser(description="Make a fake Facebook export")
+    parser.add_argument('--posts', type=int, default=1000, help="number of sections (100 to 1000000)")
+    parser.add_argument('--output', required=True, help="HTML file to write")
+    parser.add_argument('--media-dir', help="also write small photo and video files here")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--username', default="Ellie Ellie")
+    args = parser.parse_args()
+
+    media_files = generate_export(args.output, args.posts, args.seed, args.username, args.media_dir)
+    print(f"Wrote {args.posts} sections to {args.output} ({len(media_files)} media links)")
+
+if __name__ == "__main__":
+    main()
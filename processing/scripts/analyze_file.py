@@ -1,29 +1,24 @@
 #!/usr/bin/env python3
 
-from bs4 import BeautifulSoup
+from section_index import get_section_index
 
 def analyze_file(html_file):
     """Analyze the HTML file structure"""
     
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    soup = BeautifulSoup(content, 'html.parser')
-    
-    # Find all sections with class="_a6-g"
-    all_sections = soup.find_all('section', class_='_a6-g')
-    print(f"BeautifulSoup found {len(all_sections)} sections")
+    # Sections with class="_a6-g", from the saved section index
+    all_sections, _ = get_section_index(html_file)
+    print(f"Found {len(all_sections)} sections")
     
     # Check first few sections
     for i, section in enumerate(all_sections[:5]):
-        headers = section.find_all('h2', class_=['_2ph_', '_a6-h', '_a6-i'])
+        headers = section.headers
         if headers:
             print(f"Section {i+1}: {len(headers)} headers")
             for j, header in enumerate(headers):
-                print(f"  Header {j+1}: {header.get_text()}")
+                print(f"  Header {j+1}: {header}")
         else:
             print(f"Section {i+1}: No headers found")
         print("---")
 
 if __name__ == "__main__":
-    analyze_file('first_cut.html')
\ No newline at end of file
+    analyze_file('first_cut.html')
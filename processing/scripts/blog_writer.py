@@ -0,0 +1,49 @@
+"""
+Writing blog pages piece by piece
+
+Pages are written straight to a buffered file (or a gzip file) as each
+post is rendered, instead of building the whole page as one big string
+first. The statistics box is written after the posts, once the numbers
+are known; the page layout moves it back to the top.
+"""
+
+import gzip
+
+# How much text is collected before it is written to disk (in bytes)
+WRITE_BUFFER = 1024 * 1024
+
+def output_path(output_file, compress=False):
+    """The file name actually written (gzipped pages get .gz added)"""
+    return f"{output_file}.gz" if compress else output_file
+
+def open_output(output_file, compress=False, archive=None):
+    """
+    Open a page for writing text; with compress the file is gzipped.
+    With archive (a site_archive.SiteArchive) the page goes into it instead.
+    """
+    if archive is not None:
+        return archive.open_text(output_file, compress)
+    if compress:
+        return gzip.open(output_path(output_file, True), 'wt', encoding='utf-8')
+    return open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER)
+
+class PostStats:
+    """Counts posts as they are written, for the statistics box"""
+
+    def __init__(self):
+        self.total = 0
+        self.photo_only = 0
+        self.first_date = None
+        self.last_date = None
+
+    def add(self, post):
+        self.total += 1
+        if post.photo_only:
+            self.photo_only += 1
+        if self.first_date is None:
+            self.first_date = post.date
+        self.last_date = post.date
+
+    @property
+    def with_text(self):
+        return self.total - self.photo_only
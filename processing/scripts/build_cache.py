@@ -0,0 +1,176 @@
+"""
+On-disk build cache for Facebook Export to Blog Converter
+
+Every post section is stored under a hash of its raw HTML plus the settings
+that change how a post looks. When the export only gained a few new posts,
+the unchanged ones are loaded from here instead of being parsed, cleaned
+and rendered again.
+
+Only the slow part of a post is stored: its cleaned body, date and text
+(see build_body in create_fb_posts.py). Titles and the finished <article>
+are made again on every run, which is quick, so a new MAX_TITLE_LENGTH
+keeps every stored body.
+
+Results for different settings are kept in separate folders, and the
+folders of older settings are deleted at the end of a build (prune), so
+trying out settings doesn't keep filling the disk.
+
+SectionMemory keeps results in memory between the builds of --watch, for
+every stage of a post, and only forgets a stage when its settings change.
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+
+import config
+
+# Bump this when the cached data changes shape
+CACHE_VERSION = 3
+
+# Settings from config.py that each stage of building a post depends on:
+# which sections are posts, their cleaned body (only this one is saved in
+# the build cache) and the finished post with its title
+STAGE_SETTINGS = {
+    'classify': [
+        'FACEBOOK_USERNAME',
+        'POST_TYPE_PATTERNS',
+        'INCLUDE_PHOTOS',
+        'INCLUDE_VIDEOS',
+        'INCLUDE_STATUS_UPDATES',
+    ],
+    'body': [
+        'FIX_MEDIA_PATHS',
+        'RELATIVE_MEDIA_PATH',
+        'FACEBOOK_CLUTTER_TERMS',
+        'RESPONSIVE_IMAGES',
+        'IMAGE_WIDTHS',
+        'IMAGE_VARIANT_FORMAT',
+        'RELATIVE_IMAGE_VARIANTS_PATH',
+        'LAZY_LOAD_IMAGES',
+        'DEDUPLICATE_MEDIA',
+        'RELATIVE_DEDUP_MEDIA_PATH',
+    ],
+    'post': [
+        'SKIP_EMPTY_POSTS',
+        'MAX_TITLE_LENGTH',
+        'FACEBOOK_CLUTTER_TERMS',
+    ],
+}
+
+def settings_fingerprint(names, code_files=(), extra=()):
+    """Hash the settings called names (and the code that uses them)"""
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for name in names:
+        digest.update(f"{name}={getattr(config, name, None)!r}\n".encode('utf-8'))
+    # Anything else that changes the output, e.g. whether an optional package is installed
+    digest.update(repr(list(extra)).encode('utf-8'))
+    # Changing the converter itself should also throw away old results
+    for path in code_files:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+class BuildCache:
+    """
+    A folder of pickled results for the current settings, one file per section hash.
+    fingerprint is the settings_fingerprint of what the results depend on.
+    """
+
+    def __init__(self, cache_dir, fingerprint):
+        self.posts_dir = os.path.join(cache_dir, 'posts')
+        self.fingerprint = fingerprint
+        self.cache_dir = os.path.join(self.posts_dir, self.fingerprint[:16])
+
+    def key(self, raw_html):
+        """Cache key for the raw HTML of one section"""
+        digest = hashlib.sha256(self.fingerprint.encode())
+        digest.update(raw_html.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pickle")
+
+    def get(self, key):
+        """Return the stored entry for key, or None if it is not cached"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key, entry):
+        """Store entry under key (safe to call from several processes)"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def prune(self):
+        """Delete the results saved for other settings; returns how many folders were removed"""
+        try:
+            names = os.listdir(self.posts_dir)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            if name != os.path.basename(self.cache_dir):
+                shutil.rmtree(os.path.join(self.posts_dir, name), ignore_errors=True)
+                removed += 1
+        return removed
+
+class SectionMemory:
+    """
+    What the earlier builds of one long-running process (--watch) found for
+    each section, keyed by its raw HTML: the footer date ('when'), the post
+    type ('type'), the cleaned body ('body'), the SHA-256 of the raw HTML
+    ('hash') and the finished Post ('post'). start_build forgets only the
+    stages whose settings changed, so a new MAX_TITLE_LENGTH just titles and
+    renders the posts again. Sections that are no longer in the export are
+    forgotten at the end of each build.
+    """
+
+    # Stage -> what is worked out again when its settings change
+    DEPENDENT = {
+        'classify': ('type', 'post'),
+        'body': ('body', 'post'),
+        'post': ('post',),
+    }
+
+    def __init__(self):
+        self.sections = {}
+        self.seen = {}
+        self.fingerprints = {}
+
+    def start_build(self, fingerprints):
+        """Begin a build with these settings_fingerprints (one per stage); returns the stages that changed"""
+        # (sections of a build that stopped half-way are kept too)
+        self.sections.update(self.seen)
+        changed = [stage for stage in self.DEPENDENT if self.fingerprints.get(stage) != fingerprints[stage]]
+        forget = {name for stage in changed for name in self.DEPENDENT[stage]}
+        for record in self.sections.values():
+            for name in forget:
+                record.pop(name, None)
+        self.fingerprints = dict(fingerprints)
+        self.seen = {}
+        return changed
+
+    def record(self, raw_html):
+        """The dict kept for one raw section (empty for a new one); changes to it are kept"""
+        record = self.seen.get(raw_html)
+        if record is None:
+            record = self.sections.pop(raw_html, None)
+            if record is None:
+                record = {}
+            self.seen[raw_html] = record
+        return record
+
+    def finish_build(self):
+        """Forget the sections the build didn't read"""
+        self.sections, self.seen = self.seen, {}
+
+    def __len__(self):
+        return len(self.sections)
@@ -0,0 +1,95 @@
+"""
+Post type detection for Facebook Export to Blog Converter
+
+All scripts use this to decide whether a section is a status update, a
+photo post or a video post. Every pattern from POST_TYPE_PATTERNS is
+compiled into one regular expression, so a header is checked in a single
+scan no matter how many patterns (or translations) there are.
+"""
+
+import re
+from functools import lru_cache
+
+from config import *
+from helper import get_username_patterns
+from section_stream import raw_headers
+
+# Header classes Facebook uses for the "... added a new photo" line
+HEADER_CLASSES = ['_2ph_', '_a6-h', '_a6-i']
+
+# Short names used in counts and reports
+POST_TYPE_NAMES = {
+    'status_update': 'status',
+    'photo_post': 'photo',
+    'video_post': 'video',
+}
+
+def header_text(section):
+    """All header texts of a section joined and lowercased ('' when it has none)"""
+    headers = section.find_all('h2', class_=HEADER_CLASSES)
+    return ' '.join([h.get_text() for h in headers]).lower()
+
+def raw_header_text(section_html):
+    """The same as header_text, straight from a section's HTML (no parsing)"""
+    return ' '.join(raw_headers(section_html, HEADER_CLASSES)).lower()
+
+class PostClassifier:
+    """Decides the post type of a header text with one compiled regex"""
+
+    def __init__(self, include_status=None, include_photos=None, include_videos=None):
+        self.include_status = INCLUDE_STATUS_UPDATES if include_status is None else include_status
+        self.include_photos = INCLUDE_PHOTOS if include_photos is None else include_photos
+        self.include_videos = INCLUDE_VIDEOS if include_videos is None else include_videos
+
+        username_patterns = get_username_patterns()
+        alternatives = []
+        lookaheads = []
+        for post_type, patterns in username_patterns.items():
+            escaped = [re.escape(pattern) for pattern in patterns if pattern]
+            if not escaped:
+                continue
+            alternatives.extend(escaped)
+            lookaheads.append(f"(?=(?P<{post_type}>{'|'.join(escaped)}))?")
+        alternatives.append('video')
+        lookaheads.append('(?=(?P<video>video))?')
+
+        # The first lookahead only lets the scan stop where some pattern starts;
+        # the optional ones after it record every pattern that starts there
+        self.regex = re.compile(f"(?=(?:{'|'.join(alternatives)})){''.join(lookaheads)}")
+        self.post_types = list(username_patterns)
+
+    def matches(self, text):
+        """Set of pattern groups found anywhere in text (plus 'video' for the word video)"""
+        found = set()
+        for match in self.regex.finditer(text):
+            for name, value in match.groupdict().items():
+                if value is not None:
+                    found.add(name)
+        return found
+
+    def classify(self, text):
+        """Return 'status', 'photo', 'video' or None for a lowercased header text"""
+        if not text:
+            return None
+        found = self.matches(text)
+
+        if self.include_status and 'status_update' in found:
+            return 'status'
+        if self.include_photos and 'photo_post' in found and 'video' not in found:
+            return 'photo'
+        if self.include_videos:
+            if 'video_post' in found:
+                return 'video'
+            # Photo posts that mention a video
+            if 'photo_post' in found and 'video' in found:
+                return 'video'
+        return None
+
+    def classify_section(self, section):
+        """Post type of a BeautifulSoup section (see classify)"""
+        return self.classify(header_text(section))
+
+@lru_cache(maxsize=None)
+def get_post_classifier(include_status=None, include_photos=None, include_videos=None):
+    """Shared classifier, built once per set of include options"""
+    return PostClassifier(include_status, include_photos, include_videos)
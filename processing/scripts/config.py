@@ -25,6 +25,10 @@ INPUT_FILE = "processing/input/your_posts__check_ins__photos_and_videos_1.html"
 # The folder with your Facebook photos and videos (should be in processing/input/media)
 MEDIA_DIR = "processing/input/media"
 
+# Big exports are split into several files (..._1.html, ..._2.html, ...).
+# Read all of them? (True = yes, False = only INPUT_FILE)
+INCLUDE_ALL_PARTS = True
+
 # Where to save your blog (the output folder)
 OUTPUT_DIR = "processing/output"
 
@@ -34,6 +38,29 @@ INCLUDE_TIMESTAMP = True
 # The start of the blog filename (don't change unless you want)
 OUTPUT_PREFIX = "fb-posts"  # Example: fb-posts-YYYYMMDD-HHMMSS.html
 
+# Split the blog into one page per month or per year, with a small index page?
+# ("month", "year", or None = everything on one big page)
+# Big archives open much faster in the browser when split.
+SPLIT_PAGES = None
+
+# Save the blog pages gzip-compressed (.html.gz)? Useful when a web server
+# sends them out as-is; leave False to open the pages straight from disk.
+GZIP_OUTPUT = False
+
+# Put Facebook's styles in one shared .css file next to the blog, keeping only
+# the styles your posts use? (False = paste all of them into every page)
+SHARED_CSS = True
+
+# Save the whole blog, photos and videos included, as one file ready to upload?
+# ("zip", "tar.gz", or None = normal files in OUTPUT_DIR)
+# Unpack it anywhere and open the page inside the "output" folder.
+OUTPUT_ARCHIVE = None
+
+# Also save a small database of all posts (date, type, title, photos, ...) for
+# looking posts up later, e.g. "fbblog.py posts --type video --year 2019"
+# (empty = don't save)
+POST_INDEX_FILE = "processing/output/posts.sqlite"
+
 # ============================================================================
 # WHAT TO INCLUDE? (True = yes, False = no)
 # ============================================================================
@@ -56,6 +83,11 @@ INCLUDE_STATUS_UPDATES = False
 # Shorten long blog post titles (number of letters)
 MAX_TITLE_LENGTH = 40
 
+# Only include posts from this day on and/or up to this day ("YYYY-MM-DD", None = no limit)
+# (same as: --since 2019-01-01 --until 2019-12-31; add --since-last-run for only new posts)
+POSTS_SINCE = None
+POSTS_UNTIL = None
+
 # ============================================================================
 # IMAGE AND VIDEO SETTINGS
 # ============================================================================
@@ -66,6 +98,34 @@ FIX_MEDIA_PATHS = True
 # Where the blog should look for your photos (usually don't change)
 RELATIVE_MEDIA_PATH = "../input/media"
 
+# Only load photos when they scroll into view, and reserve their space on the page?
+# (True = faster pages that don't jump around while loading)
+LAZY_LOAD_IMAGES = True
+
+# Make smaller copies of your photos so the blog loads much faster?
+# (True = yes, needs Pillow: pip3 install Pillow. Clicking a photo still opens the full size.)
+RESPONSIVE_IMAGES = False
+
+# Widths (in pixels) of the smaller copies; the browser picks the best one for the screen
+IMAGE_WIDTHS = [480, 960]
+
+# File type and quality (1-100) of the smaller copies
+IMAGE_VARIANT_FORMAT = "webp"
+IMAGE_VARIANT_QUALITY = 80
+
+# Where the smaller copies are saved, and where the blog looks for them
+IMAGE_VARIANTS_DIR = "processing/output/media-variants"
+RELATIVE_IMAGE_VARIANTS_PATH = "media-variants"
+
+# Copy each photo and video into the output folder only once, even when Facebook
+# exported it several times under different names? The copies are named after
+# their contents, so web servers can cache them forever.
+DEDUPLICATE_MEDIA = False
+
+# Where those copies are saved, and where the blog looks for them
+DEDUP_MEDIA_DIR = "processing/output/media"
+RELATIVE_DEDUP_MEDIA_PATH = "media"
+
 # ============================================================================
 # ADVANCED: FILTERING FACEBOOK CLUTTER (EXTRA)
 # ============================================================================
@@ -95,4 +155,62 @@ POST_TYPE_PATTERNS = {
         "{username} added a new video",
         "{username} added new videos"
     ]
-}
\ No newline at end of file
+}
+
+# ============================================================================
+# ADVANCED: SPEED AND MEMORY (EXTRA)
+# ============================================================================
+
+# Read the Facebook file one post at a time instead of all at once?
+# (True = uses much less memory on big exports, False = load the whole file)
+STREAM_INPUT = True
+
+# How many posts (or, without STREAM_INPUT, export parts) to work on at the same time
+# (None = one per CPU core, 1 = one after another)
+MAX_WORKERS = None
+
+# Posts are handed to those workers in groups of this many
+# (bigger = less overhead, smaller = less memory and smoother progress)
+POST_BATCH_SIZE = 200
+
+# Remember finished posts between runs so only new or changed posts are rebuilt?
+# (True = much faster re-runs, False = rebuild everything every time)
+BUILD_CACHE = True
+
+# Where the remembered posts are kept (safe to delete at any time)
+CACHE_DIR = "processing/.cache"
+
+# How much memory (in MB) sorting the posts by date may use; bigger exports
+# are sorted in parts saved to temporary files, then merged while writing
+SORT_MEMORY_MB = 256
+
+# Where those temporary files go (None = the computer's usual temp folder)
+SORT_TEMP_DIR = None
+
+# ============================================================================
+# ADVANCED: RUN TIMINGS (EXTRA)
+# ============================================================================
+
+# Show a progress line with the time left while posts are read?
+# (only shown when running in a terminal)
+SHOW_PROGRESS = True
+
+# Print how long each step took and which posts were slowest?
+# (same as running: python3 processing/scripts/create_fb_posts.py --profile)
+PROFILE = False
+
+# Save the run timings as a JSON file, for comparing runs (empty = don't save)
+# (same as: --metrics processing/output/run-metrics.json)
+METRICS_FILE = ""
+
+# ============================================================================
+# ADVANCED: PREVIEW WHILE EDITING (EXTRA)
+# ============================================================================
+
+# With --watch the blog is rebuilt whenever config.py, the export or the media
+# folder change, and shown at http://localhost:WATCH_PORT (the page reloads itself)
+# (same as running: python3 processing/scripts/create_fb_posts.py --watch)
+WATCH_PORT = 8000
+
+# How often (in seconds) to look for changes
+WATCH_INTERVAL = 0.5
@@ -8,330 +8,554 @@ This main script processes a Facebook HTML export file and converts it into a cl
 Note: All settings can be customized in config.py
 """
 
-import re
 from bs4 import BeautifulSoup
-from datetime import datetime
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from itertools import groupby
+import hashlib
 import html
+import json
+import argparse
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 from config import *
-from helper import get_username_patterns, get_output_filename, validate_config
+from dates import DateRange, get_date_parser
+from external_sort import PostSorter
+from helper import get_input_files, get_output_filename, get_archive_filename, get_stylesheet_filename, validate_config
+from blog_writer import PostStats, open_output, output_path
+from build_cache import STAGE_SETTINGS, BuildCache, settings_fingerprint
+from classifier import get_post_classifier, raw_header_text
+from image_size import build_dimension_index, dimension_index_fingerprint
+from media_index import AMBIGUOUS, MISSING, build_media_index, media_index_fingerprint
+from media_store import build_media_store, media_store_fingerprint
+from media_variants import build_image_variants, responsive_images_enabled, variants_fingerprint
+from metrics import Progress, RunMetrics
+from post import Post
+from post_index import PostIndexWriter
+from site_archive import add_site_media, open_site_archive
+from section_stream import FOOTER_DATE_TEXT, iter_raw_sections, read_footer_dates, read_original_css
+from stylesheet import UsedSelectors, write_stylesheet
+from titles import clean_title, extract_first_sentence, get_title_engine
+from transforms import ClutterRemover, MediaPathFixer, post_transforms, run_pipeline
 
 def parse_facebook_date(date_str):
     """Convert Facebook date format to YYYY-MM-DD"""
-    try:
-        # Facebook dates are like "Aug 09, 2025 9:48:19 am"
-        date_str = date_str.strip()
-        dt = datetime.strptime(date_str, "%b %d, %Y %I:%M:%S %p")
-        return dt.strftime("%Y-%m-%d"), dt
-    except ValueError:
-        try:
-            # Try alternative format without seconds
-            dt = datetime.strptime(date_str, "%b %d, %Y %I:%M %p")
-            return dt.strftime("%Y-%m-%d"), dt
-        except ValueError:
-            print(f"Could not parse date: {date_str}")
-            return "unknown-date", None
-
-def extract_first_sentence(text):
-    """Extract first sentence from text, limit to 40 chars"""
-    if not text:
-        return ""
-    
-    # Remove HTML tags and decode entities
-    text = re.sub(r'<[^>]+>', '', text)
-    text = html.unescape(text)
-    text = text.strip()
-    
-    if not text:
-        return ""
-    
-    # Find first sentence (end with ., !, ?, or line break)
-    sentences = re.split(r'[.!?]|\n', text)
-    first_sentence = sentences[0].strip() if sentences else text
-    
-    # Limit to 40 characters
-    if len(first_sentence) > 40:
-        return first_sentence[:37] + "..."
-    
-    return first_sentence
-
-def clean_title(title):
-    """Clean up title by removing unwanted prefixes and cleaning formatting"""
-    if not title:
-        return title
-    
-    # Remove Facebook clutter terms from title
-    for term in FACEBOOK_CLUTTER_TERMS:
-        # Remove both hyphenated and space versions
-        patterns = [
-            term,
-            term.replace(' ', '-'),
-            term.replace('-', ' ')
-        ]
-        for pattern in patterns:
-            title = re.sub(re.escape(pattern), '', title, flags=re.IGNORECASE)
-    
-    for prefix in []:
-        if title.lower().startswith(prefix.lower()):
-            title = title[len(prefix):].strip()
-            # Remove leading dash, space, or other punctuation
-            while title and title[0] in '-_ ':
-                title = title[1:].strip()
-            break
-    
-    # Clean up multiple Mobile-uploads patterns
-    title = re.sub(r'(Mobile[-\s]*uploads?\s*)+', '', title, flags=re.IGNORECASE)
-    
-    # Clean up any remaining leading/trailing dashes or spaces
-    title = re.sub(r'^[-\s_]+|[-\s_]+$', '', title)
-    
-    # Clean up multiple consecutive dashes or spaces
-    title = re.sub(r'[-\s_]{2,}', '-', title)
-    
-    return title
+    # Facebook dates are like "Aug 09, 2025 9:48:19 am" (see dates.py for the others)
+    parsed = get_date_parser().parse(date_str)
+    if parsed is None:
+        print(f"Could not parse date: {date_str.strip()}")
+        return "unknown-date", None
+    return parsed
 
 def clean_facebook_content(section):
     """Clean up Facebook content by removing UI elements and labels"""
-    # Remove Facebook clutter labels from photo galleries
-    for div in section.find_all('div'):
-        div_text = div.get_text().strip()
-        if div_text in FACEBOOK_CLUTTER_TERMS:
-            # Replace the text with empty string but keep the div structure
-            div.string = ''
-    
+    run_pipeline(section, [ClutterRemover()])
     return section
 
 def fix_image_paths(section):
     """Fix image and video paths to point to the correct location"""
-    if not FIX_MEDIA_PATHS:
-        return section
-        
-    # Fix img src attributes
-    for img in section.find_all('img'):
-        src = img.get('src', '')
-        if src and not src.startswith('http'):
-            # Handle Facebook media paths
-            if 'your_facebook_activity/posts/media' in src:
-                # Extract the path after "media/"
-                media_path = src.split('your_facebook_activity/posts/media/')[-1]
-                img['src'] = f"{RELATIVE_MEDIA_PATH}/{media_path}"
-            elif not src.startswith(f'{RELATIVE_MEDIA_PATH}/'):
-                img['src'] = f"{RELATIVE_MEDIA_PATH}/{src.split('/')[-1]}" if '/' in src else f"{RELATIVE_MEDIA_PATH}/{src}"
-    
-    # Fix video src attributes
-    for video in section.find_all('video'):
-        src = video.get('src', '')
-        if src and not src.startswith('http'):
-            # Handle Facebook media paths
-            if 'your_facebook_activity/posts/media' in src:
-                # Extract the path after "media/"
-                media_path = src.split('your_facebook_activity/posts/media/')[-1]
-                video['src'] = f"{RELATIVE_MEDIA_PATH}/{media_path}"
-            elif not src.startswith(f'{RELATIVE_MEDIA_PATH}/'):
-                video['src'] = f"{RELATIVE_MEDIA_PATH}/{src.split('/')[-1]}" if '/' in src else f"{RELATIVE_MEDIA_PATH}/{src}"
-    
-    # Fix href attributes in links
-    for link in section.find_all('a'):
-        href = link.get('href', '')
-        if href and not href.startswith('http'):
-            # Handle Facebook media paths
-            if 'your_facebook_activity/posts/media' in href:
-                # Extract the path after "media/"
-                media_path = href.split('your_facebook_activity/posts/media/')[-1]
-                link['href'] = f"{RELATIVE_MEDIA_PATH}/{media_path}"
-            elif not href.startswith(f'{RELATIVE_MEDIA_PATH}/'):
-                link['href'] = f"{RELATIVE_MEDIA_PATH}/{href.split('/')[-1]}" if '/' in href else f"{RELATIVE_MEDIA_PATH}/{href}"
-    
+    run_pipeline(section, [MediaPathFixer()])
     return section
 
-def extract_css(content):
-    """Extract CSS from original Facebook export"""
-    css_match = re.search(r'<style[^>]*>(.*?)</style>', content, re.DOTALL)
-    if css_match:
-        return css_match.group(1)
-    return ""
+def iter_sections(input_file):
+    """
+    Yield (raw_html, section, offset, position) for every post section (class="_a6-g") of the export.
+    section is None when it has not been parsed yet; offset is where the
+    section starts in the file (None when not known) and position is roughly
+    how many bytes of the file have been read (for progress).
+    """
+    if STREAM_INPUT:
+        # Only one post at a time is read; it gets parsed later if needed
+        for start, end, raw_html in iter_raw_sections(input_file):
+            yield raw_html.decode('utf-8'), None, start, end
+    else:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        soup = BeautifulSoup(content, 'html.parser')
+        sections = soup.find_all('section', class_='_a6-g')
+        file_size = os.path.getsize(input_file)
+        for number, section in enumerate(sections, 1):
+            yield str(section), section, None, file_size * number // len(sections)
+
+def render_post(post, section):
+    """Render one post as an <article> block for the blog page"""
+    return f"""
+    <article class="blog-post">
+        <div class="post-header">
+            <h2 class="post-title">{html.escape(post.blog_title)}</h2>
+        </div>
+        <div class="post-content">
+            <div class="facebook-content">
+                {section}
+            </div>
+        </div>
+    </article>
+"""
+
+def _untimed(name):
+    return nullcontext()
 
-def filter_facebook_posts(input_file):
-    """Filter Facebook export to extract only status updates, photo posts, and video posts"""
+def build_body(section, metrics=None):
+    """
+    Clean one wanted section and read what its post needs: the slow part of
+    building a post, and what the build cache keeps (see finish_post for the rest).
+    Returns a dict, or None if the section should be skipped. The section is
+    emptied afterwards; the dict keeps its finished HTML.
+    """
+    timed = metrics.stage if metrics else _untimed
     
-    if not os.path.exists(input_file):
-        raise FileNotFoundError(f"Input file not found: {input_file}")
+    # Remove UI labels, fix media paths and find the date and text, all in one walk
+    with timed('clean'):
+        found = run_pipeline(section, post_transforms())
     
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Extract date from footer
+    if not found['date_text']:
+        return None
     
-    soup = BeautifulSoup(content, 'html.parser')
+    with timed('dates'):
+        formatted_date, dt_obj = parse_facebook_date(found['date_text'])
     
-    # Find all sections with class="_a6-g"
-    all_sections = soup.find_all('section', class_='_a6-g')
+    if not dt_obj:
+        return None
     
-    target_sections = []
-    status_count = 0
-    photo_count = 0
-    video_count = 0
+    post_text = found['post_text']
+    meaningful_caption = found['caption']
     
-    # Get username patterns from config
-    username_patterns = get_username_patterns()
+    # Skip empty posts if configured
+    if SKIP_EMPTY_POSTS and not post_text and not meaningful_caption:
+        return None
     
-    for section in all_sections:
-        # Get all header texts to determine post type
-        headers = section.find_all('h2', class_=['_2ph_', '_a6-h', '_a6-i'])
-        if headers:
-            # Combine all header texts
-            all_header_text = ' '.join([h.get_text() for h in headers]).lower()
-            
-            # Check if this section should be included based on config
-            section_included = False
-            
-            # Check for status updates
-            if INCLUDE_STATUS_UPDATES:
-                for pattern in username_patterns['status_update']:
-                    if pattern in all_header_text:
-                        target_sections.append(section)
-                        status_count += 1
-                        section_included = True
-                        break
-            
-            # Check for photo posts (if not already included)
-            if not section_included and INCLUDE_PHOTOS:
-                for pattern in username_patterns['photo_post']:
-                    if pattern in all_header_text and 'video' not in all_header_text:
-                        target_sections.append(section)
-                        photo_count += 1
-                        section_included = True
-                        break
-            
-            # Check for video posts (if not already included) 
-            if not section_included and INCLUDE_VIDEOS:
-                for pattern in username_patterns['video_post']:
-                    if pattern in all_header_text:
-                        target_sections.append(section)
-                        video_count += 1
-                        section_included = True
-                        break
-                # Also check for photo posts that mention video
-                if not section_included:
-                    for pattern in username_patterns['photo_post']:
-                        if pattern in all_header_text and 'video' in all_header_text:
-                            target_sections.append(section)
-                            video_count += 1
-                            section_included = True
-                            break
-    
-    print(f"Filtered {len(target_sections)} posts from {len(all_sections)} total sections")
-    print(f"  - Status updates: {status_count}")
-    print(f"  - Photo posts: {photo_count}")
-    print(f"  - Video posts: {video_count}")
-    
-    return target_sections, content
-
-def create_facebook_blog(input_file, output_file):
-    """Convert Facebook posts into blog format"""
-    
-    # Filter posts
-    sections, original_content = filter_facebook_posts(input_file)
+    # Determine title
+    if post_text:
+        title = extract_first_sentence(post_text)
+    elif meaningful_caption:
+        title = meaningful_caption
+    else:
+        # This is a photo-only post with no meaningful captions
+        title = "photos"
     
+    with timed('render'):
+        content = str(section)
+        # Only the HTML is needed from now on; free the parsed section
+        section.decompose()
+    return {
+        'date': formatted_date,
+        'timestamp': dt_obj,
+        'title_text': title,
+        'photo_only': not post_text and not meaningful_caption,
+        'media': tuple(found['media']),
+        'media_problems': tuple(found['media_problems']),
+        'html': content,
+    }
+
+def finish_post(body, post_type=None, metrics=None):
+    """
+    Title and render a body from build_body as a Post. Quick next to
+    build_body, so it runs again on every build (a new MAX_TITLE_LENGTH
+    only changes this part of a post).
+    """
+    timed = metrics.stage if metrics else _untimed
+    
+    # Clean up and shorten the title, and make a filename-safe version of it
+    with timed('titles'):
+        title, safe_title = get_title_engine().title_and_slug(body['title_text'])
+    
+    post = Post(
+        date=body['date'],
+        timestamp=body['timestamp'],
+        title=title,
+        slug=safe_title,
+        type=post_type,
+        html=None,
+        photo_only=body['photo_only'],
+        media=body['media'],
+        media_problems=body['media_problems'],
+    )
+    with timed('render'):
+        post.html = render_post(post, body['html'])
+    return post
+
+def build_post(section, post_type=None, metrics=None):
+    """
+    Clean one wanted section and turn it into a Post (None if it should be skipped).
+    The section is emptied afterwards; the Post keeps the finished HTML.
+    """
+    body = build_body(section, metrics)
+    return finish_post(body, post_type, metrics) if body else None
+
+# Where this script lives, and the scripts whose code changes the body of a post
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BODY_CODE_FILES = ['create_fb_posts.py', 'dates.py', 'image_size.py', 'media_index.py', 'media_store.py', 'media_variants.py', 'titles.py', 'transforms.py']
+
+def _body_fingerprint():
+    """settings_fingerprint of everything a post's body depends on (media included)"""
+    return settings_fingerprint(
+        STAGE_SETTINGS['body'],
+        code_files=[os.path.join(SCRIPT_DIR, name) for name in BODY_CODE_FILES],
+        extra=[variants_fingerprint(), dimension_index_fingerprint() if LAZY_LOAD_IMAGES else None, media_store_fingerprint(),
+               media_index_fingerprint() if FIX_MEDIA_PATHS else None],
+    )
+
+def _stage_fingerprints():
+    """settings_fingerprint of each stage of building a post (for SectionMemory)"""
+    return {
+        'classify': settings_fingerprint(STAGE_SETTINGS['classify']),
+        'body': _body_fingerprint(),
+        'post': settings_fingerprint(STAGE_SETTINGS['post']),
+    }
+
+def _open_build_cache():
+    """Return the build cache, or None when it is switched off"""
+    if not BUILD_CACHE:
+        return None
+    return BuildCache(CACHE_DIR, _body_fingerprint())
+
+def _footer_time(raw_html):
+    """datetime of the footer date of a raw section, or None when it can't be read"""
+    date_match = FOOTER_DATE_TEXT.search(raw_html)
+    parsed = get_date_parser().parse(html.unescape(date_match.group(1))) if date_match else None
+    return parsed[1] if parsed else None
+
+def _outside_range(raw_html, date_range):
+    """True when the footer date of a raw section is readable and outside date_range"""
+    when = _footer_time(raw_html)
+    return when is not None and when not in date_range
+
+def _build_entry(raw_html, section, post_classifier, cache, metrics, date_range=None):
+    """
+    Classify one section and build its body, returns (entry, True if it came from the build cache).
+    entry is {'type': post type or None, 'body': see build_body, or None}, or
+    None when the section is dated outside date_range (then it is never parsed).
+    """
+    # Only the footer date is read from sections outside the date range
+    if date_range:
+        with metrics.stage('date_range'):
+            if _outside_range(raw_html, date_range):
+                return None, False
+    
+    with metrics.stage('classify'):
+        if section is None:
+            # From the header lines in the raw HTML, so unwanted sections are never parsed
+            post_type = post_classifier.classify(raw_header_text(raw_html))
+        else:
+            post_type = post_classifier.classify_section(section)
+    if not post_type:
+        # Quicker to classify again next time than to read it from the cache
+        return {'type': None, 'body': None}, False
+    
+    # Reuse the body from an earlier run if this section has not changed
+    with metrics.stage('cache'):
+        key = cache.key(raw_html) if cache else None
+        cached = cache.get(key) if cache else None
+    if cached is not None:
+        return {'type': post_type, 'body': cached['body']}, True
+    
+    if section is None:
+        with metrics.stage('parse'):
+            section = BeautifulSoup(raw_html, 'html.parser').section
+    body = build_body(section, metrics)
+    # Wanted sections that turn out empty or undated are saved too (with no
+    # body), so the next run doesn't parse and clean them again
+    if cache:
+        with metrics.stage('cache'):
+            cache.put(key, {'body': body})
+    return {'type': post_type, 'body': body}, False
+
+def _worker_count():
+    """How many processes MAX_WORKERS asks for"""
+    return MAX_WORKERS or os.cpu_count() or 1
+
+# The build cache of a worker process, opened once by _start_post_worker
+_worker_cache = None
+
+def _start_post_worker():
+    global _worker_cache
+    _worker_cache = _open_build_cache()
+
+def _content_hash(entry, raw_bytes):
+    """SHA-256 of a section's bytes in the export, only worked out for sections with a body"""
+    return hashlib.sha256(raw_bytes).hexdigest() if entry and entry['body'] else None
+
+def _build_batch(raw_sections, date_samples, date_range=None):
+    """
+    Build a batch of raw sections (bytes, as in the export) in a worker process.
+    Returns ([(entry, cached, seconds, content hash) for each section, in order], metrics).
+    """
+    # The same date format as in the main process
+    get_date_parser().detect(date_samples)
+    post_classifier = get_post_classifier()
+    metrics = RunMetrics()
+    results = []
+    for raw_bytes in raw_sections:
+        started = time.perf_counter()
+        entry, cached = _build_entry(raw_bytes.decode('utf-8'), None, post_classifier, _worker_cache, metrics, date_range)
+        results.append((entry, cached, time.perf_counter() - started, _content_hash(entry, raw_bytes)))
+    return results, metrics
+
+def _filter_file(input_file, on_progress=None, on_post=None, date_range=None, pool=None, memory=None):
+    """
+    Find and build the wanted posts in one export file, returns (posts, counts, metrics).
+    With on_post, each post is passed to it straight away instead of being returned.
+    With date_range (a DateRange), sections dated outside it are skipped
+    before they are looked up, parsed or cleaned.
+    With pool (a ProcessPoolExecutor started by filter_facebook_posts, only
+    with STREAM_INPUT), the sections are built there in batches of
+    POST_BATCH_SIZE; the posts still come out in file order.
+    With memory (a SectionMemory), only what it doesn't know yet is worked
+    out, and what was worked out is added to it.
+    """
     posts = []
-    photo_only_count = 0
+    add_post = on_post or posts.append
+    counts = {'total': 0, 'status': 0, 'photo': 0, 'video': 0, 'cached': 0, 'remembered': 0, 'outside_range': 0}
+    metrics = RunMetrics()
+    cache = _open_build_cache() if pool is None else None
+    file_name = os.path.basename(input_file)
     
-    for section in sections:
-        # Clean Facebook content first (remove UI labels)
-        section = clean_facebook_content(section)
-        
-        # Fix image paths
-        section = fix_image_paths(section)
-        
-        # Extract date from footer
-        footer = section.find('footer')
-        if not footer:
-            continue
-            
-        date_div = footer.find('div', class_='_a72d')
-        if not date_div:
-            continue
-            
-        date_str = date_div.get_text().strip()
-        formatted_date, dt_obj = parse_facebook_date(date_str)
-        
-        if not dt_obj:
-            continue
-        
-        # Extract post content
-        content_div = section.find('div', class_='_2pin')
-        post_text = ""
-        meaningful_caption = ""
-        
-        if content_div:
-            # Look for text content in the main content area
-            text_divs = content_div.find_all('div', recursive=False)
-            for div in text_divs:
-                text = div.get_text().strip()
-                if text and not text.startswith('Updated '):
-                    post_text = text
-                    break
-        
-        # If no main text content, look for meaningful photo captions
-        if not post_text:
-            # Look for captions in photo gallery areas (class _3-95 often contains captions)
-            caption_divs = section.find_all('div', class_='_3-95')
-            for div in caption_divs:
-                caption_text = div.get_text().strip()
-                # Filter out Facebook UI labels and unwanted text
-                if (caption_text and 
-                    len(caption_text) > 5 and  # Must be more than just a few characters
-                    not any(term in caption_text for term in FACEBOOK_CLUTTER_TERMS) and
-                    not caption_text.startswith('Click for') and  # Skip video click prompts
-                    not caption_text.startswith('Updated ') and  # Skip update timestamps
-                    len(caption_text) < 100):  # Not too long to be main content
-                    meaningful_caption = caption_text
-                    break
-        
-        # Skip empty posts if configured
-        if SKIP_EMPTY_POSTS and not post_text and not meaningful_caption:
-            continue
+    post_classifier = get_post_classifier()
+    
+    # Work out the date format from the first few posts
+    date_samples = read_footer_dates(input_file)
+    get_date_parser().detect(date_samples)
+    
+    def finish(number, offset, position, entry, reused, seconds, content_hash):
+        """
+        Finish, count and pass on the result of one section, in file order.
+        reused is 'cached' or 'remembered' when the section wasn't built now.
+        """
+        started = time.perf_counter()
+        post = None
+        # (a remembered section may still have a body from when its type was wanted)
+        if entry and entry['type'] and entry.get('body'):
+            # (in case the footer date could not be read before building)
+            if date_range and entry['body']['timestamp'] not in date_range:
+                entry = None
+            elif entry.get('post'):
+                post = entry['post']
+            else:
+                # (kept with the entry, for when it is remembered)
+                post = entry['post'] = finish_post(entry['body'], entry['type'], metrics)
         
-        # Determine title
-        if post_text:
-            title = extract_first_sentence(post_text)
-        elif meaningful_caption:
-            title = meaningful_caption
+        if entry is None:
+            counts['outside_range'] += 1
         else:
-            # This is a photo-only post with no meaningful captions
-            photo_only_count += 1
-            title = "photos"
-        
-        # Clean up title
-        title = clean_title(title)
-        
-        # Limit title length if configured
-        if len(title) > MAX_TITLE_LENGTH:
-            title = title[:MAX_TITLE_LENGTH].rsplit(' ', 1)[0] + '...'
-        
-        # Clean up title for filename safety
-        safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-        safe_title = re.sub(r'[-\s]+', '-', safe_title)
-        
-        blog_title = f"{formatted_date}-{safe_title}" if safe_title else formatted_date
-        
-        posts.append({
-            'date': formatted_date,
-            'datetime': dt_obj,
-            'title': title,
-            'blog_title': blog_title,
-            'content': post_text,
-            'html': clean_facebook_content(section)
-        })
+            if reused:
+                counts[reused] += 1
+            if entry['type']:
+                counts[entry['type']] += 1
+            if post:
+                # Where the post came from (a cached post may have moved in the file)
+                post.source, post.offset, post.content_hash = file_name, offset, content_hash
+                add_post(post)
+            metrics.add_section(
+                seconds + time.perf_counter() - started,
+                file=file_name,
+                section=number,
+                title=post.blog_title if post else None,
+            )
+        if on_progress:
+            on_progress(position, number)
+    
+    def recall(raw_html):
+        """
+        Look a raw section (text or bytes) up in memory, returns (record, done):
+        done is True when nothing has to be built again, and then record is
+        None if the section is dated outside date_range.
+        """
+        record = memory.record(raw_html)
+        text = None
+        if date_range:
+            if 'when' not in record:
+                text = raw_html.decode('utf-8') if isinstance(raw_html, bytes) else raw_html
+                with metrics.stage('date_range'):
+                    record['when'] = _footer_time(text)
+            if record['when'] is not None and record['when'] not in date_range:
+                return None, True
+        if 'type' not in record and 'body' in record:
+            # Only the post types changed, the body is still good
+            text = text or (raw_html.decode('utf-8') if isinstance(raw_html, bytes) else raw_html)
+            with metrics.stage('classify'):
+                record['type'] = post_classifier.classify(raw_header_text(text))
+        return record, 'type' in record and (record['type'] is None or 'body' in record)
+    
+    def remember(record, entry, content_hash):
+        """Keep a freshly built entry in its memory record; returns the record to finish"""
+        if record is None or entry is None:
+            return entry
+        record.pop('post', None)
+        record.update(entry)
+        record['hash'] = content_hash
+        return record
+    
+    if pool is None:
+        for raw_html, section, offset, position in iter_sections(input_file):
+            counts['total'] += 1
+            started = time.perf_counter()
+            record, done = recall(raw_html) if memory is not None else (None, False)
+            if done:
+                finish(counts['total'], offset, position, record, 'remembered', time.perf_counter() - started,
+                       record and record.get('hash'))
+                continue
+            entry, cached = _build_entry(raw_html, section, post_classifier, cache, metrics, date_range)
+            seconds = time.perf_counter() - started
+            content_hash = _content_hash(entry, raw_html.encode('utf-8'))
+            entry = remember(record, entry, content_hash)
+            finish(counts['total'], offset, position, entry, 'cached' if cached else None, seconds, content_hash)
+        return posts, counts, metrics
+    
+    # Batches sent to the pool and not finished yet (oldest first), and the
+    # batch being filled: section numbers, offsets and memory records (with
+    # True for those that need no building), and the raw sections to build
+    pending = deque()
+    batch = []
+    raw_batch = []
+    
+    def send_batch():
+        future = pool.submit(_build_batch, raw_batch, date_samples, date_range) if raw_batch else None
+        pending.append((batch, future))
+    
+    def finish_batch():
+        sent, future = pending.popleft()
+        results = []
+        if future is not None:
+            results, batch_metrics = future.result()
+            metrics.merge(batch_metrics)
+        results = iter(results)
+        for number, offset, position, record, done in sent:
+            if done:
+                finish(number, offset, position, record, 'remembered', 0.0, record and record.get('hash'))
+                continue
+            entry, cached, seconds, content_hash = next(results)
+            entry = remember(record, entry, content_hash)
+            finish(number, offset, position, entry, 'cached' if cached else None, seconds, content_hash)
+    
+    # The sections go to the workers as they are in the file; decoding,
+    # hashing and everything else happens there
+    for start, end, raw_bytes in iter_raw_sections(input_file):
+        counts['total'] += 1
+        record, done = recall(raw_bytes) if memory is not None else (None, False)
+        batch.append((counts['total'], start, end, record, done))
+        if not done:
+            raw_batch.append(raw_bytes)
+        if len(batch) >= POST_BATCH_SIZE:
+            send_batch()
+            batch, raw_batch = [], []
+            # Keep every worker busy, but don't read far ahead of the results
+            while len(pending) > 2 * _worker_count():
+                finish_batch()
+    
+    if batch:
+        send_batch()
+    while pending:
+        finish_batch()
+    
+    return posts, counts, metrics
+
+def filter_facebook_posts(input_files, metrics=None, collect=None, date_range=None, memory=None):
+    """
+    Filter Facebook export to extract only status updates, photo posts, and video posts.
+    Returns (posts, original_css); with collect, posts are passed to it in file
+    order instead and the returned list is empty. With date_range (a DateRange)
+    only posts dated inside it are kept. With memory (a SectionMemory kept
+    between builds) only the stages whose settings changed run again for
+    sections read before.
+    """
+    
+    if isinstance(input_files, str):
+        input_files = [input_files]
+    
+    for input_file in input_files:
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+    
+    posts = []
+    collect = collect or posts.append
+    totals = {'total': 0, 'status': 0, 'photo': 0, 'video': 0, 'cached': 0, 'remembered': 0, 'outside_range': 0}
+    
+    def add_result(result):
+        file_posts, counts, file_metrics = result
+        for post in file_posts:
+            collect(post)
+        for key in totals:
+            totals[key] += counts[key]
+        if metrics:
+            metrics.merge(file_metrics)
+    
+    sizes = [os.path.getsize(input_file) for input_file in input_files]
+    progress = Progress(sum(sizes), "Reading posts", enabled=SHOW_PROGRESS)
+    
+    # Sections are sent to the worker processes in batches (needs STREAM_INPUT)
+    batches = STREAM_INPUT and MAX_WORKERS != 1 and _worker_count() > 1
+    
+    if memory is not None:
+        memory.start_build(_stage_fingerprints())
+    
+    # (memory only lives in this process, so with it the parts are read here one by one)
+    if len(input_files) > 1 and MAX_WORKERS != 1 and not batches and memory is None:
+        # One worker per export part, results are merged in file order
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {pool.submit(_filter_file, input_file, date_range=date_range): number for number, input_file in enumerate(input_files)}
+            finished = {}
+            next_file = 0
+            done_bytes = done_sections = 0
+            for future in as_completed(futures):
+                number = futures[future]
+                finished[number] = future.result()
+                done_bytes += sizes[number]
+                done_sections += finished[number][1]['total']
+                progress.update(done_bytes, done_sections)
+                # Pass the posts on in file order, as soon as all earlier files are done
+                while next_file in finished:
+                    add_result(finished.pop(next_file))
+                    next_file += 1
+    else:
+        pool = ProcessPoolExecutor(max_workers=_worker_count(), initializer=_start_post_worker) if batches else None
+        with pool if pool is not None else nullcontext():
+            done_bytes = done_sections = 0
+            for input_file, size in zip(input_files, sizes):
+                def on_progress(position, sections):
+                    progress.update(done_bytes + position, done_sections + sections)
+                result = _filter_file(input_file, on_progress, collect, date_range, pool, memory)
+                add_result(result)
+                done_bytes += size
+                done_sections += result[1]['total']
+    progress.finish()
+    if memory is not None:
+        memory.finish_build()
+    
+    # Results saved for earlier settings can't be used any more
+    if BUILD_CACHE:
+        _open_build_cache().prune()
     
-    # Sort by date based on config
-    posts.sort(key=lambda x: x['datetime'], reverse=REVERSE_CHRONOLOGICAL)
+    files_note = f" in {len(input_files)} files" if len(input_files) > 1 else ""
+    kept = totals['status'] + totals['photo'] + totals['video']
+    print(f"Filtered {kept} posts from {totals['total']} total sections{files_note}")
+    print(f"  - Status updates: {totals['status']}")
+    print(f"  - Photo posts: {totals['photo']}")
+    print(f"  - Video posts: {totals['video']}")
+    if BUILD_CACHE:
+        print(f"  - Reused from build cache: {totals['cached']} sections")
+    if memory is not None:
+        print(f"  - Kept in memory from the last build: {totals['remembered']} sections")
+    if date_range:
+        print(f"  - Outside {date_range}: {totals['outside_range']} sections (skipped)")
     
-    # Generate blog HTML
-    blog_html = f"""<!DOCTYPE html>
+    return posts, read_original_css(input_files[0])
+
+def render_page_head(page_title, original_css, stylesheet=None):
+    """
+    Start of every blog page: the <head> with all styles, up to the opening <body>.
+    stylesheet is a .css file to link after them (the shared Facebook styles).
+    """
+    stylesheet_link = f'\n    <link rel="stylesheet" href="{html.escape(stylesheet)}">' if stylesheet else ""
+    return f"""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{BLOG_TITLE}</title>
+    <title>{page_title}</title>
     <style>
         * {{
             box-sizing: border-box;
@@ -401,6 +625,20 @@ def create_facebook_blog(input_file, output_file):
             padding: 24px;
         }}
         
+        /* The statistics box is written after the posts but shown at the top */
+        .blog-page {{
+            display: flex;
+            flex-direction: column;
+        }}
+        
+        .blog-page > .blog-header {{
+            order: -2;
+        }}
+        
+        .blog-page > .stats {{
+            order: -1;
+        }}
+        
         .stats {{
             background: linear-gradient(135deg, #e3f2fd 0%, #f0f8ff 100%);
             padding: 20px;
@@ -528,56 +766,375 @@ def create_facebook_blog(input_file, output_file):
             line-height: 1.5;
         }}
         
+        .archive-nav {{
+            display: flex;
+            justify-content: space-between;
+            gap: 12px;
+            margin-bottom: 24px;
+            font-size: 1.1rem;
+        }}
+        
+        .archive-nav a, .archive-index a {{
+            color: #4267b2;
+            text-decoration: none;
+        }}
+        
+        .archive-index {{
+            background: white;
+            padding: 20px 24px;
+            border-radius: 12px;
+            box-shadow: 0 2px 12px rgba(0,0,0,0.08);
+        }}
+        
+        .archive-index li {{
+            margin: 4px 0;
+        }}
+        
         /* Include original Facebook styles */
-        {extract_css(original_content)}
-    </style>
+        {original_css}
+    </style>{stylesheet_link}
 </head>
 <body>
-    <div class="blog-header">
-        <h1>{BLOG_TITLE}</h1>
-        <h3>{BLOG_DESCRIPTION}</h3>
+<div class="blog-page">
+"""
+
+PAGE_END = """
+</div>
+</body>
+</html>"""
+
+def render_blog_header(heading, description):
+    """The big title box at the top of a page"""
+    return f"""    <div class="blog-header">
+        <h1>{heading}</h1>
+        <h3>{description}</h3>
     </div>
-    
+"""
+
+def render_stats(stats):
+    """The statistics box, from a PostStats of the posts in page order"""
+    return f"""    
     <div class="stats">
         <strong>Statistics:</strong><br>
-        📝 Total posts: {len(posts)}<br>
-        📷 Photo-only posts (no text): {photo_only_count}<br>
-        💬 Posts with text: {len(posts) - photo_only_count}<br>
-        📅 Date range: {posts[-1]['date'] if posts else 'N/A'} to {posts[0]['date'] if posts else 'N/A'}
+        📝 Total posts: {stats.total}<br>
+        📷 Photo-only posts (no text): {stats.photo_only}<br>
+        💬 Posts with text: {stats.with_text}<br>
+        📅 Date range: {stats.last_date or 'N/A'} to {stats.first_date or 'N/A'}
     </div>
 """
-    
-    # Add each post
-    for post in posts:
-        blog_html += f"""
-    <article class="blog-post">
-        <div class="post-header">
-            <h2 class="post-title">{html.escape(post['blog_title'])}</h2>
-        </div>
-        <div class="post-content">
-            <div class="facebook-content">
-                {post['html']}
-            </div>
-        </div>
-    </article>
+
+def render_archive_nav(newer, older, index_name):
+    """Links between neighbouring archive pages and back to the index"""
+    newer_link = f'<a href="{newer[0]}">← {newer[1]}</a>' if newer else '<span></span>'
+    older_link = f'<a href="{older[0]}">{older[1]} →</a>' if older else '<span></span>'
+    return f"""
+    <nav class="archive-nav">
+        {newer_link}
+        <a href="{index_name}">All posts</a>
+        {older_link}
+    </nav>
 """
+
+def render_posts_page_head(page_title, original_css, output_file, used):
+    """Page head for a page of posts: Facebook styles inline, or linked when used is collected"""
+    if used is None:
+        return render_page_head(page_title, original_css)
+    return render_page_head(page_title, "", os.path.basename(get_stylesheet_filename(output_file)))
+
+def period_of(post):
+    """The month ("YYYY-MM") or year ("YYYY") page a post belongs on"""
+    if SPLIT_PAGES == "year":
+        return f"{post.timestamp.year:04d}"
+    return f"{post.timestamp.year:04d}-{post.timestamp.month:02d}"
+
+def period_label(period):
+    """Heading for a period page: 2025 or August 2025"""
+    if len(period) == 4:
+        return period
+    return datetime(int(period[:4]), int(period[5:7]), 1).strftime("%B %Y")
+
+def write_archive_pages(posts, original_css, output_file, period_counts=None, used=None, site_archive=None):
+    """
+    Write one page per month (or year) plus a small index page at output_file.
+    Archive pages sit next to the index so media paths keep working.
+    posts must be in page order; they are read once, one at a time, when
+    period_counts (posts per period_of) is known up front. With used (a
+    UsedSelectors), pages link the shared stylesheet and the posts' classes
+    are added to it. With site_archive (a SiteArchive) the pages go into it.
+    Returns a PostStats of everything written and the number of archive pages.
+    """
+    if period_counts is None:
+        posts = list(posts)
+        period_counts = Counter(period_of(post) for post in posts)
     
-    blog_html += """
-</body>
-</html>"""
+    index_name = os.path.basename(output_file)
+    pages = [
+        (period, get_archive_filename(output_file, period), period_label(period), count)
+        for period, count in sorted(period_counts.items(), reverse=REVERSE_CHRONOLOGICAL)
+    ]
+    stats = PostStats()
     
-    # Write output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(blog_html)
+    page_posts = groupby(posts, key=period_of)
+    for number, ((_, page_file, label, _), (_, period_posts)) in enumerate(zip(pages, page_posts)):
+        # In newest-first order the previous page holds the newer posts
+        before = pages[number - 1] if number > 0 else None
+        after = pages[number + 1] if number + 1 < len(pages) else None
+        if not REVERSE_CHRONOLOGICAL:
+            before, after = after, before
+        newer = (os.path.basename(before[1]), before[2]) if before else None
+        older = (os.path.basename(after[1]), after[2]) if after else None
+        nav = render_archive_nav(newer, older, index_name)
+        
+        with open_output(page_file, GZIP_OUTPUT, site_archive) as out:
+            out.write(render_posts_page_head(f"{label} - {BLOG_TITLE}", original_css, output_file, used))
+            out.write(render_blog_header(BLOG_TITLE, label))
+            out.write(nav)
+            for post in period_posts:
+                out.write(post.html)
+                stats.add(post)
+                if used is not None:
+                    used.add_html(post.html)
+            out.write(nav)
+            out.write(PAGE_END)
     
-    print(f"Created blog with {len(posts)} posts")
-    print(f"Photo-only posts: {photo_only_count}")
-    print(f"Posts with text: {len(posts) - photo_only_count}")
-    print(f"Saved as: {output_file}")
+    # The index page only links to the archive pages, so it stays small
+    with open_output(output_file, GZIP_OUTPUT, site_archive) as out:
+        out.write(render_page_head(BLOG_TITLE, ""))
+        out.write(render_blog_header(BLOG_TITLE, BLOG_DESCRIPTION))
+        out.write("""
+    <div class="archive-index">
+""")
+        for year, year_pages in groupby(pages, key=lambda page: page[0][:4]):
+            out.write(f"""        <h2>{year}</h2>
+        <ul>
+""")
+            for _, page_file, label, count in year_pages:
+                post_word = "post" if count == 1 else "posts"
+                out.write(f"""            <li><a href="{os.path.basename(page_file)}">{label}</a> ({count} {post_word})</li>
+""")
+            out.write("""        </ul>
+""")
+        out.write("""    </div>
+""")
+        out.write(render_stats(stats))
+        out.write(PAGE_END)
     
-    return len(posts)
+    return stats, len(pages)
 
-if __name__ == "__main__":
+# How many missing or ambiguous media links are listed by name
+MEDIA_PROBLEMS_SHOWN = 10
+
+def print_media_problems(problems):
+    """List media links whose file is missing, or shares its name with other files"""
+    for kind, message in ((MISSING, f"Media files not found in {MEDIA_DIR}"),
+                          (AMBIGUOUS, "Media links matching several files with the same name (used the first)")):
+        links = sorted(link for link, problem in problems.items() if problem == kind)
+        if not links:
+            continue
+        print(f"⚠️  {message}: {len(links)}")
+        for link in links[:MEDIA_PROBLEMS_SHOWN]:
+            print(f"     {link}")
+        if len(links) > MEDIA_PROBLEMS_SHOWN:
+            print(f"     ... and {len(links) - MEDIA_PROBLEMS_SHOWN} more")
+
+# Remembers the newest post written so far, for --since-last-run (kept in CACHE_DIR)
+LAST_RUN_NAME = "last-run.json"
+
+def read_last_run():
+    """Timestamp of the newest post any earlier run has written, or None"""
+    try:
+        with open(os.path.join(CACHE_DIR, LAST_RUN_NAME), 'r', encoding='utf-8') as f:
+            return datetime.fromisoformat(json.load(f)['newest_post'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def save_last_run(newest):
+    """Remember newest as the newest post written (unless an earlier run went further)"""
+    previous = read_last_run()
+    if newest is None or (previous is not None and previous >= newest):
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, LAST_RUN_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'newest_post': newest.isoformat()}, f)
+
+def create_facebook_blog(input_files, output_file, metrics=None, date_range=None, record=True, reuse_media=False,
+                         memory=None):
+    """
+    Convert Facebook posts into blog format (timings go into metrics when given).
+    With date_range (a DateRange) only the posts dated inside it are included.
+    With record False, neither the post database nor the newest post (for
+    --since-last-run) is saved, as for previews. With reuse_media, MEDIA_DIR
+    isn't looked at: the media lists, photo sizes and copies of the last run are used.
+    With memory (a SectionMemory), posts are kept in memory for the next build
+    of the same process (see filter_facebook_posts).
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+    post_index_file = POST_INDEX_FILE if record else None
+    if reuse_media:
+        print("Media files: using what the last run found")
+    
+    # List the media folder once, so every link can be checked without touching the disk
+    if FIX_MEDIA_PATHS and not reuse_media:
+        with metrics.stage('media_index'):
+            media_files, reused = build_media_index()
+        print(f"Media files found: {media_files}" + (" (folder unchanged since last run)" if reused else ""))
+    
+    # Make smaller copies of the photos first (skipped when switched off)
+    if RESPONSIVE_IMAGES and not reuse_media:
+        if responsive_images_enabled():
+            with metrics.stage('image_variants'):
+                made, skipped = build_image_variants()
+            print(f"Resized photos: {made} new, {skipped} unchanged")
+        else:
+            print("⚠️  RESPONSIVE_IMAGES needs Pillow (pip3 install Pillow), using original photos")
+    
+    # Copy each distinct photo and video once, named after its contents
+    if DEDUPLICATE_MEDIA and not reuse_media:
+        with metrics.stage('media_store'):
+            # (with OUTPUT_ARCHIVE the files are only hashed, and packed later)
+            files, distinct, saved = build_media_store(store_dir=None if OUTPUT_ARCHIVE else DEDUP_MEDIA_DIR)
+        print(f"Media files: {files}, stored once each: {distinct} ({saved / 1024 / 1024:.1f} MB of duplicates skipped)")
+    
+    # Read all photo sizes once (only photos that changed are opened again)
+    if LAZY_LOAD_IMAGES and not reuse_media:
+        with metrics.stage('image_sizes'):
+            known_sizes = build_dimension_index()
+        print(f"Photo sizes known: {known_sizes}")
+    
+    # With OUTPUT_ARCHIVE the pages and media go into one zip or tar.gz instead of OUTPUT_DIR
+    site_archive = open_site_archive(output_file) if OUTPUT_ARCHIVE else None
+    with site_archive if site_archive is not None else nullcontext():
+        # Filter posts; they are sorted as they come in, using at most SORT_MEMORY_MB
+        period_counts = Counter()
+        media_problems = {}
+        newest = None
+        # Every post also goes into the post database (POST_INDEX_FILE) as it comes in;
+        # with a date range only those posts are replaced, the others are kept
+        post_index = PostIndexWriter(post_index_file, date_range) if post_index_file else nullcontext()
+        with PostSorter(SORT_MEMORY_MB * 1024 * 1024, REVERSE_CHRONOLOGICAL, SORT_TEMP_DIR) as sorter, post_index:
+            def collect(post):
+                nonlocal newest
+                sorter.add(post)
+                if post_index_file:
+                    post_index.add(post)
+                if SPLIT_PAGES:
+                    period_counts[period_of(post)] += 1
+                for link, problem in post.media_problems:
+                    media_problems.setdefault(link, problem)
+                if newest is None or post.timestamp > newest:
+                    newest = post.timestamp
+            
+            with metrics.stage('filter'):
+                _, original_css = filter_facebook_posts(input_files, metrics, collect, date_range, memory)
+            
+            # Sort by date based on config
+            with metrics.stage('sort'):
+                sorter.finish()
+            if sorter.runs:
+                print(f"Sorted {len(sorter)} posts in {len(sorter.runs)} parts (more than SORT_MEMORY_MB)")
+            posts = sorter.sorted_posts()
+            
+            # Facebook styles go to one shared file, trimmed to what the posts use
+            used = UsedSelectors() if SHARED_CSS else None
+            
+            # Write the blog HTML straight to disk, one post at a time
+            with metrics.stage('write'):
+                if SPLIT_PAGES:
+                    stats, page_count = write_archive_pages(posts, original_css, output_file, period_counts, used, site_archive)
+                else:
+                    stats = PostStats()
+                    with open_output(output_file, GZIP_OUTPUT, site_archive) as out:
+                        out.write(render_posts_page_head(BLOG_TITLE, original_css, output_file, used))
+                        out.write(render_blog_header(BLOG_TITLE, BLOG_DESCRIPTION))
+                        
+                        # Add each post
+                        for post in posts:
+                            out.write(post.html)
+                            stats.add(post)
+                            if used is not None:
+                                used.add_html(post.html)
+                        
+                        # Now that every post is counted
+                        out.write(render_stats(stats))
+                        out.write(PAGE_END)
+        
+        if used is not None:
+            with metrics.stage('stylesheet'):
+                stylesheet_file = get_stylesheet_filename(output_file)
+                original_size, kept_size = write_stylesheet(stylesheet_file, original_css, used, GZIP_OUTPUT, site_archive)
+            print(f"Facebook styles: kept {kept_size:,} of {original_size:,} characters in {output_path(stylesheet_file, GZIP_OUTPUT)}")
+            
+        # Photos and videos go in straight from where they are
+        if site_archive is not None:
+            with metrics.stage('archive_media'):
+                added, outside = add_site_media(site_archive)
+            print(f"Media files packed: {added}")
+            if outside:
+                print(f"⚠️  {outside} media files were left out: their links point above the archive's folder")
+    
+    print(f"Created blog with {stats.total} posts")
+    print(f"Photo-only posts: {stats.photo_only}")
+    print(f"Posts with text: {stats.with_text}")
+    if SPLIT_PAGES:
+        print(f"Archive pages: {page_count}")
+    print(f"Saved as: {site_archive.path if site_archive else output_path(output_file, GZIP_OUTPUT)}")
+    if post_index_file:
+        print(f"Post database: {post_index_file}")
+    print_media_problems(media_problems)
+    if record:
+        save_last_run(newest)
+    
+    return stats.total
+
+def main(argv=None, memory=None):
+    """
+    Run the converter with the command line options in argv (default: sys.argv).
+    memory is a SectionMemory to build with (used by --watch).
+    """
+    parser = argparse.ArgumentParser(description="Convert a Facebook export into a blog")
+    parser.add_argument('--profile', action='store_true', default=PROFILE,
+                        help="show how long each stage took and the slowest posts")
+    parser.add_argument('--metrics', default=METRICS_FILE, metavar='FILE',
+                        help="save the run timings as JSON to FILE")
+    parser.add_argument('--since', default=POSTS_SINCE, metavar='YYYY-MM-DD',
+                        help="only posts from this day on")
+    parser.add_argument('--until', default=POSTS_UNTIL, metavar='YYYY-MM-DD',
+                        help="only posts up to and including this day")
+    parser.add_argument('--since-last-run', action='store_true',
+                        help="only posts newer than the newest post of earlier runs")
+    parser.add_argument('--output', metavar='FILE',
+                        help="save the blog as FILE (default: a new file in OUTPUT_DIR)")
+    parser.add_argument('--no-record', action='store_true',
+                        help="don't save the post database or remember the newest post (for previews)")
+    parser.add_argument('--reuse-media', action='store_true',
+                        help="don't look at MEDIA_DIR again, use what the last run found there")
+    parser.add_argument('--watch', action='store_true',
+                        help=f"build again after every change and show the blog at http://localhost:{WATCH_PORT}")
+    args = parser.parse_args(argv)
+    
+    if args.watch:
+        if args.output:
+            parser.error("--watch always saves to its own preview file, leave out --output")
+        from watch import watch
+        watch([option for option in (sys.argv[1:] if argv is None else argv) if option != '--watch'])
+        return
+    
+    # Which posts to include, by date
+    try:
+        date_range = DateRange.from_days(args.since, args.until)
+    except ValueError:
+        parser.error("--since and --until need dates like 2019-12-31")
+    if args.since_last_run:
+        last_run = read_last_run()
+        if last_run is None:
+            print("No earlier run found, including all posts")
+        elif date_range.start is None or last_run >= date_range.start:
+            # Facebook dates go down to the second
+            date_range.start = last_run + timedelta(seconds=1)
+    if date_range:
+        print(f"📅 Only posts from {date_range}")
+    
     # Show configuration warnings if any
     warnings = validate_config()
     if warnings:
@@ -587,19 +1144,31 @@ if __name__ == "__main__":
         print()
     
     # Use configuration file paths
-    input_file = INPUT_FILE
-    output_file = get_output_filename()
-    print(f"📄 Input: {input_file}")
+    input_files = get_input_files()
+    output_file = args.output or get_output_filename()
+    for input_file in input_files:
+        print(f"📄 Input: {input_file}")
     print(f"📄 Output: {output_file}")
     # Ensure output directory exists
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
     
     try:
-        create_facebook_blog(input_file, output_file)
+        metrics = RunMetrics()
+        create_facebook_blog(input_files, output_file, metrics, date_range, not args.no_record, args.reuse_media, memory)
         print("\n✅ Blog creation completed successfully!")
+        
+        if args.profile:
+            metrics.print_report()
+        if args.metrics:
+            metrics.write_json(args.metrics)
+            print(f"📊 Run metrics saved as: {args.metrics}")
 
     except FileNotFoundError as e:
         print(f"❌ Error: {e}")
-        print(f"Please ensure {input_file} exists in the current directory.")
+        print(f"Please ensure {INPUT_FILE} exists in the current directory.")
     except Exception as e:
-        print(f"❌ Unexpected error: {e}")
\ No newline at end of file
+        print(f"❌ Unexpected error: {e}")
+
+if __name__ == "__main__":
+    main()
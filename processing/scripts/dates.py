@@ -0,0 +1,180 @@
+"""
+Post dates for Facebook Export to Blog Converter
+
+Reads the date under each post ("Aug 09, 2025 9:48:19 am") without
+datetime.strptime: month names and am/pm come from fixed tables (so the
+computer's language settings don't matter), exports in other languages
+("9 août 2025 à 21:48", "9. August 2025 um 21:48:19") work too, and dates
+that were already read are remembered. The format an export uses is
+worked out from its first few dates and tried first from then on.
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# Month names in the languages Facebook exports are most often in
+# (each list is January to December; short forms are added below)
+MONTH_NAMES = {
+    'english': ["january", "february", "march", "april", "may", "june", "july",
+                "august", "september", "october", "november", "december"],
+    'french': ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+               "août", "septembre", "octobre", "novembre", "décembre"],
+    'german': ["januar", "februar", "märz", "april", "mai", "juni", "juli",
+               "august", "september", "oktober", "november", "dezember"],
+    'spanish': ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+                "agosto", "septiembre", "octubre", "noviembre", "diciembre"],
+    'italian': ["gennaio", "febbraio", "marzo", "aprile", "maggio", "giugno", "luglio",
+                "agosto", "settembre", "ottobre", "novembre", "dicembre"],
+    'portuguese': ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho",
+                   "agosto", "setembro", "outubro", "novembro", "dezembro"],
+    'dutch': ["januari", "februari", "maart", "april", "mei", "juni", "juli",
+              "augustus", "september", "oktober", "november", "december"],
+}
+
+# Short forms that aren't just the first three letters of a name above
+MONTH_ABBREVIATIONS = {
+    'sept': 9, 'janv': 1, 'févr': 2, 'fevr': 2, 'avr': 4, 'juil': 7, 'aout': 8,
+    'déc': 12, 'mrz': 3, 'maerz': 3, 'mrt': 3, 'setiembre': 9,
+}
+
+def _month_table():
+    """Lowercase month name or short form -> month number"""
+    table = dict(MONTH_ABBREVIATIONS)
+    for names in MONTH_NAMES.values():
+        for number, name in enumerate(names, 1):
+            table[name] = number
+            table.setdefault(name[:3], number)
+            table.setdefault(name[:4], number)
+    return table
+
+MONTHS = _month_table()
+
+# am/pm -> hours to add to 12-hour clock times ("a.m.", "A M", ... are tidied up first)
+AM_PM = {'am': 0, 'pm': 12}
+
+# One part of a pattern for the time of day: 9:48, 9:48:19, 21:48, 9:48:19 am
+_TIME = r'(?P<hour>\d{1,2})[:.h](?P<minute>\d{2})(?:[:.](?P<second>\d{2}))?(?:\s*(?P<ampm>[ap]\.?\s?m\.?))?'
+
+# A word between the date and the time ("at", "à", "um", "a las", "alle", ...)
+_JOIN = r'(?:[^\W\d_]+\.?\s+){0,2}'
+
+# Every date layout we know, tried in this order until one matches
+DATE_FORMATS = {
+    # Aug 09, 2025 9:48:19 am, Saturday, August 9, 2025 at 9:48 PM (English exports)
+    'month_day_year': re.compile(
+        rf'(?:[^\W\d_]+,\s+)?(?P<month>[^\W\d_]+)\.?\s+(?P<day>\d{{1,2}}),?\s+(?P<year>\d{{4}}),?\s+{_JOIN}{_TIME}',
+        re.IGNORECASE),
+    # 9 août 2025 à 21:48, 9. August 2025 um 21:48:19, 9 de agosto de 2025 21:48
+    'day_month_year': re.compile(
+        rf'(?P<day>\d{{1,2}})\.?\s+(?:de\s+)?(?P<month>[^\W\d_]+)\.?\s+(?:de\s+)?(?P<year>\d{{4}}),?\s+{_JOIN}{_TIME}',
+        re.IGNORECASE),
+    # 2025-08-09 21:48:19
+    'iso': re.compile(
+        rf'(?P<year>\d{{4}})-(?P<month>\d{{1,2}})-(?P<day>\d{{1,2}})[T\s]+{_TIME}',
+        re.IGNORECASE),
+}
+
+# How many dates are looked at to work out the export's format
+DETECT_SAMPLES = 20
+
+def _from_match(match):
+    """(YYYY-MM-DD, datetime) from a DATE_FORMATS match, or None if it isn't a real date"""
+    year, month, day, hour, minute, second, am_pm = match.group(
+        'year', 'month', 'day', 'hour', 'minute', 'second', 'ampm')
+    month = int(month) if month.isdigit() else MONTHS.get(month.lower())
+    if month is None:
+        return None
+
+    hour = int(hour)
+    if am_pm:
+        # 12-hour clock: 12 am is midnight, 12 pm is noon
+        if not 1 <= hour <= 12:
+            return None
+        am_pm = am_pm.lower()
+        hour = hour % 12 + AM_PM.get(am_pm, AM_PM.get(re.sub(r'[\s.]', '', am_pm), 0))
+
+    try:
+        when = datetime(int(year), month, int(day), hour, int(minute), int(second or 0))
+    except ValueError:
+        # No such day (like Feb 30) or time
+        return None
+    return f"{year}-{month:02d}-{int(day):02d}", when
+
+class DateParser:
+    """Reads Facebook dates, trying the export's own format first"""
+
+    def __init__(self, formats=DATE_FORMATS, cache_size=65536):
+        self.formats = list(formats.items())
+        self.seen = 0
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def detect(self, date_strings):
+        """Put the format that matches most of these dates first; returns its name (or None)"""
+        hits = {}
+        for date_str in list(date_strings)[:DETECT_SAMPLES]:
+            for name, pattern in self.formats:
+                match = pattern.fullmatch(date_str.strip())
+                if match and _from_match(match):
+                    hits[name] = hits.get(name, 0) + 1
+                    break
+        if not hits:
+            return None
+        best = max(hits, key=hits.get)
+        self.formats.sort(key=lambda item: item[0] != best)
+        return best
+
+    def _parse(self, date_str):
+        """(YYYY-MM-DD, datetime) for a date string, or None when it can't be read"""
+        date_str = date_str.strip()
+        for position, (name, pattern) in enumerate(self.formats):
+            match = pattern.fullmatch(date_str)
+            if match:
+                parsed = _from_match(match)
+                if parsed:
+                    # Still learning the format: move the one that worked to the front
+                    if position and self.seen < DETECT_SAMPLES:
+                        self.formats.insert(0, self.formats.pop(position))
+                    self.seen += 1
+                    return parsed
+        return None
+
+    def parse_many(self, date_strings):
+        """Read a whole list of dates at once (the format is detected from the first few)"""
+        date_strings = list(date_strings)
+        if not self.seen:
+            self.detect(date_strings)
+        return [self.parse(date_str) for date_str in date_strings]
+
+class DateRange:
+    """
+    Posts from start (included) up to end (not included); None means no
+    limit on that side. Used for --since / --until / --since-last-run.
+    """
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_days(cls, since=None, until=None):
+        """Range for two "YYYY-MM-DD" days (or None), both days included"""
+        start = datetime.strptime(since, '%Y-%m-%d') if since else None
+        end = datetime.strptime(until, '%Y-%m-%d') + timedelta(days=1) if until else None
+        return cls(start, end)
+
+    def __bool__(self):
+        return self.start is not None or self.end is not None
+
+    def __contains__(self, when):
+        return (self.start is None or when >= self.start) and (self.end is None or when < self.end)
+
+    def __str__(self):
+        start = self.start.strftime('%Y-%m-%d %H:%M:%S') if self.start else "the first post"
+        end = (self.end - timedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S') if self.end else "the last post"
+        return f"{start} to {end}"
+
+@lru_cache(maxsize=None)
+def get_date_parser():
+    """Shared parser (one per process)"""
+    return DateParser()
@@ -0,0 +1,127 @@
+"""
+Sorting posts by date with a memory limit
+
+PostSorter collects finished posts and hands them back in date order.
+While the posts fit in the memory limit they are simply sorted in memory.
+When they don't, each full batch is sorted and written to a temporary
+file (a "run"), and the runs are merged back together while the blog is
+written, so only one post per run is in memory at a time.
+"""
+
+import heapq
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+# Most runs merged at once (more runs are first merged into bigger ones,
+# so the number of open files stays small)
+MERGE_WIDTH = 64
+
+# Rough memory use of a Post apart from its HTML (in bytes)
+POST_OVERHEAD = 400
+
+def _post_key(post):
+    return post.timestamp
+
+def _read_run(path):
+    """Posts from a run file, one at a time"""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+class PostSorter:
+    """
+    Sorts posts by timestamp using about memory_limit bytes; the rest is kept
+    in sorted runs on disk. Posts with the same timestamp keep the order they
+    were added in, like list.sort().
+    """
+
+    def __init__(self, memory_limit, reverse=False, temp_dir=None):
+        self.memory_limit = memory_limit
+        self.reverse = reverse
+        self.temp_dir = temp_dir
+        self.work_dir = None
+        self.buffer = []
+        self.buffer_size = 0
+        self.runs = []
+        self.files_made = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, post):
+        self.buffer.append(post)
+        self.buffer_size += sys.getsizeof(post.html) + POST_OVERHEAD
+        self.count += 1
+        if self.buffer_size > self.memory_limit:
+            self._spill()
+
+    def _new_run_path(self):
+        if self.work_dir is None:
+            self.work_dir = tempfile.mkdtemp(prefix='fb-posts-sort-', dir=self.temp_dir)
+        self.files_made += 1
+        return os.path.join(self.work_dir, f"run-{self.files_made}.pickle")
+
+    def _write_run(self, posts):
+        """Save already sorted posts as a run file and return its path"""
+        path = self._new_run_path()
+        with open(path, 'wb', buffering=1024 * 1024) as f:
+            for post in posts:
+                pickle.dump(post, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    def _spill(self):
+        """Sort the posts in memory and move them to a run file"""
+        if not self.buffer:
+            return
+        self.buffer.sort(key=_post_key, reverse=self.reverse)
+        self.runs.append(self._write_run(self.buffer))
+        self.buffer = []
+        self.buffer_size = 0
+
+    def _merge(self, paths):
+        return heapq.merge(*(_read_run(path) for path in paths), key=_post_key, reverse=self.reverse)
+
+    def finish(self):
+        """Call after the last add: sorts what is in memory (and merges runs down to MERGE_WIDTH)"""
+        if not self.runs:
+            # Everything fit in memory
+            self.buffer.sort(key=_post_key, reverse=self.reverse)
+            return
+
+        self._spill()
+        # Merge the oldest runs first so equal timestamps stay in the order they came
+        while len(self.runs) > MERGE_WIDTH:
+            first, rest = self.runs[:MERGE_WIDTH], self.runs[MERGE_WIDTH:]
+            merged = self._write_run(self._merge(first))
+            for path in first:
+                os.remove(path)
+            self.runs = [merged] + rest
+
+    def sorted_posts(self):
+        """Yield every post in date order (after finish)"""
+        if not self.runs:
+            posts, self.buffer = self.buffer, []
+            yield from posts
+        else:
+            yield from self._merge(self.runs)
+
+    def close(self):
+        """Delete the temporary run files"""
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+        self.runs = []
+        self.buffer = []
@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 
-import re
-from bs4 import BeautifulSoup
+import os
 from config import *
+from blog_writer import open_output
+from classifier import get_post_classifier
+from helper import get_stylesheet_filename
+from section_index import classify_entries, get_section_index, iter_section_html
+from section_stream import read_original_css
+from stylesheet import UsedSelectors, write_stylesheet
 
 def extract_sections(html_file, output_file):
     """Extract specific sections from Facebook HTML export"""
     
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    soup = BeautifulSoup(content, 'html.parser')
-    
-    # Find all sections with class="_a6-g"
-    all_sections = soup.find_all('section', class_='_a6-g')
+    # Sections with class="_a6-g", from the saved section index
+    all_sections, _ = get_section_index(html_file)
     
     # Categories we want to extract
     target_sections = []
@@ -21,63 +21,63 @@ def extract_sections(html_file, output_file):
     status_count = 0
     photo_count = 0
     
-    for section in all_sections:
-        # Get all header texts to determine post type
-        headers = section.find_all('h2', class_=['_2ph_', '_a6-h', '_a6-i'])
-        if headers:
-            # Combine all header texts
-            all_header_text = ' '.join([h.get_text() for h in headers])
-            
-            # More precise matching - only add once per section
-            if 'updated her status' in all_header_text.lower():
-                target_sections.append(section)
-                status_count += 1
-            elif ('added a new photo' in all_header_text.lower() or 
-                  ('added' in all_header_text.lower() and 'photos' in all_header_text.lower() and 'video' not in all_header_text.lower())):
-                target_sections.append(section)
-                photo_count += 1
+    # Status updates and photo posts only
+    post_classifier = get_post_classifier(include_status=True, include_photos=True, include_videos=False)
+    
+    for section, post_type in classify_entries(all_sections, post_classifier):
+        if post_type == 'status':
+            target_sections.append(section)
+            status_count += 1
+        elif post_type == 'photo':
+            target_sections.append(section)
+            photo_count += 1
+    
+    # Facebook styles: one shared file with only what the sections use, or pasted in
+    original_css = read_original_css(html_file)
+    used = UsedSelectors() if SHARED_CSS else None
+    stylesheet_file = get_stylesheet_filename(output_file)
+    if used is not None:
+        # The page itself is wrapped in Facebook's _a705 div
+        used.add_html('<div class="_a705"><main>')
+        styles = f'<link rel="stylesheet" href="{os.path.basename(stylesheet_file)}">'
+    else:
+        styles = f"""<style>
+        {original_css}
+    </style>"""
     
-    # Create the output HTML
-    html_structure = f"""<!DOCTYPE html>
+    # Write the output HTML straight to the file, one section at a time
+    with open_output(output_file) as out:
+        out.write(f"""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <title>Real Posts and Photos - Facebook Export</title>
-    <style>
-        {extract_css(content)}
-    </style>
+    {styles}
 </head>
 <body>
     <div class="_a705">
         <main>
-"""
-    
-    # Add each target section
-    for section in target_sections:
-        html_structure += str(section) + '\n'
-    
-    html_structure += """
+""")
+        
+        # Add each target section, read straight from the export
+        for section_html in iter_section_html(html_file, target_sections):
+            out.write(section_html + '\n')
+            if used is not None:
+                used.add_html(section_html)
+        
+        out.write("""
         </main>
     </div>
 </body>
-</html>"""
+</html>""")
     
-    # Write to output file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_structure)
+    if used is not None:
+        write_stylesheet(stylesheet_file, original_css, used)
     
     print(f"Extracted {len(target_sections)} sections to {output_file}")
     print(f"  - Status updates: {status_count}")
-    print(f"  - Photo/video posts: {photo_count}")
+    print(f"  - Photo posts: {photo_count}")
     return len(target_sections)
 
-def extract_css(content):
-    """Extract CSS from the original file"""
-    # Find the CSS style block
-    css_match = re.search(r'<style[^>]*>(.*?)</style>', content, re.DOTALL)
-    if css_match:
-        return css_match.group(1)
-    return ""
-
 if __name__ == "__main__":
     extract_sections('first_cut.html', 'second_cut.html')
\ No newline at end of file
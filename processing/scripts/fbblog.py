@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+One command for all the tools
+
+    python3 processing/scripts/fbblog.py build              # make the blog (like create_fb_posts.py)
+    python3 processing/scripts/fbblog.py count [FILE]       # count status updates and photo posts
+    python3 processing/scripts/fbblog.py analyze [FILE]     # show the headers of the first sections
+    python3 processing/scripts/fbblog.py debug [FILE]       # show the first status and photo headers
+    python3 processing/scripts/fbblog.py extract [FILE] [OUTPUT]   # save those sections as one page
+    python3 processing/scripts/fbblog.py index [FILE]       # just make the section index
+    python3 processing/scripts/fbblog.py posts --type video --year 2019   # look posts up
+
+FILE defaults to INPUT_FILE from config.py. The first command on a file
+reads it once and saves a section index (see section_index.py); every
+command after that uses the index instead of reading the export again.
+posts answers from the post database that build saves (POST_INDEX_FILE).
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from config import *
+
+def _index(html_file):
+    from section_index import get_section_index
+
+    started = time.perf_counter()
+    entries, reused = get_section_index(html_file)
+    how = "saved index" if reused else "indexed now"
+    print(f"{html_file}: {len(entries)} sections ({how}, {time.perf_counter() - started:.2f}s)")
+
+def _posts(args):
+    from post_index import find_posts
+
+    build_hint = "Run 'python3 processing/scripts/fbblog.py build' to save it."
+    if not os.path.exists(args.database):
+        print(f"❌ No post database at {args.database}. {build_hint}")
+        return
+    try:
+        rows = find_posts(args.database, args.type, args.year, args.media)
+    except sqlite3.DatabaseError as e:
+        print(f"❌ Can't read the post database {args.database}: {e}. {build_hint}")
+        return
+    for row in rows:
+        media = f"  [{', '.join(row['media'])}]" if row['media'] and args.media is None else ""
+        print(f"{row['timestamp']}  {row['type']:<6} {row['title']}  ({row['source_file']} @ {row['source_offset']}){media}")
+    print(f"{len(rows)} posts")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fbblog", description="Facebook export to blog tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # Options after build (--profile, --metrics FILE) go to create_fb_posts.py
+    commands.add_parser('build', help="make the blog (takes the options of create_fb_posts.py)")
+
+    for name, text in (('count', "count status updates and photo posts"),
+                       ('analyze', "show the headers of the first sections"),
+                       ('debug', "show the first status and photo headers"),
+                       ('index', "make (or check) the saved section index")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument('file', nargs='?', default=INPUT_FILE, help="export file (default: INPUT_FILE)")
+
+    extract = commands.add_parser('extract', help="save the status and photo sections as one page")
+    extract.add_argument('file', nargs='?', default=INPUT_FILE, help="export file (default: INPUT_FILE)")
+    extract.add_argument('output', nargs='?', default='second_cut.html', help="page to write (default: second_cut.html)")
+
+    posts = commands.add_parser('posts', help="look posts up in the post database saved by build")
+    posts.add_argument('--type', choices=['status', 'photo', 'video'], help="only posts of this type")
+    posts.add_argument('--year', type=int, help="only posts from this year")
+    posts.add_argument('--media', metavar='PATH', help="only posts showing this file (path inside MEDIA_DIR)")
+    posts.add_argument('--database', default=POST_INDEX_FILE, help="post database (default: POST_INDEX_FILE)")
+
+    args, build_options = parser.parse_known_args(argv)
+    if build_options and args.command != 'build':
+        parser.error(f"unrecognized arguments: {' '.join(build_options)}")
+
+    # Each tool is only loaded when it is used
+    if args.command == 'build':
+        from create_fb_posts import main as build_blog
+        build_blog(build_options)
+    elif args.command == 'count':
+        from count_unique import count_unique_sections
+        count_unique_sections(args.file)
+    elif args.command == 'analyze':
+        from analyze_file import analyze_file
+        analyze_file(args.file)
+    elif args.command == 'debug':
+        from debug_extract import debug_sections
+        debug_sections(args.file)
+    elif args.command == 'extract':
+        from extract_posts import extract_sections
+        extract_sections(args.file, args.output)
+    elif args.command == 'index':
+        _index(args.file)
+    elif args.command == 'posts':
+        _posts(args)
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,31 @@ def get_username_patterns():
         ]
     return patterns
 
+def get_input_files():
+    """
+    List the export files to convert.
+    Big accounts get their posts split over several files (..._1.html,
+    ..._2.html, ...); when INCLUDE_ALL_PARTS is on, every part next to
+    INPUT_FILE is returned in number order.
+    """
+    import glob
+    import re
+    
+    part_match = re.match(r'(.*)_(\d+)\.html$', INPUT_FILE)
+    if not INCLUDE_ALL_PARTS or not part_match:
+        return [INPUT_FILE]
+    
+    prefix = part_match.group(1)
+    parts = []
+    for path in glob.glob(f"{glob.escape(prefix)}_*.html"):
+        number = re.match(r'_(\d+)\.html$', path[len(prefix):])
+        if number:
+            parts.append((int(number.group(1)), path))
+    
+    if not parts:
+        return [INPUT_FILE]
+    return [path for _, path in sorted(parts)]
+
 def get_output_filename():
     """
     Generate the output filename based on configuration.
@@ -31,6 +56,36 @@ def get_output_filename():
     else:
         return f"{OUTPUT_DIR}/{OUTPUT_PREFIX}.html"
 
+def get_archive_filename(output_file, period):
+    """
+    Filename of one archive page (used when SPLIT_PAGES is on).
+    Example: fb-posts-YYYYMMDD-HHMMSS-2019-05.html next to the index page.
+    """
+    import os
+    
+    base, extension = os.path.splitext(output_file)
+    return f"{base}-{period}{extension}"
+
+def get_stylesheet_filename(output_file):
+    """
+    Filename of the shared Facebook stylesheet (used when SHARED_CSS is on).
+    Example: fb-posts-YYYYMMDD-HHMMSS.css next to the blog page.
+    """
+    import os
+    
+    base, _ = os.path.splitext(output_file)
+    return f"{base}.css"
+
+def get_site_archive_filename(output_file, extension):
+    """
+    Filename of the archive holding the whole blog (used when OUTPUT_ARCHIVE is on).
+    Example: fb-posts-YYYYMMDD-HHMMSS.zip next to where the blog page would be.
+    """
+    import os
+    
+    base, _ = os.path.splitext(output_file)
+    return f"{base}{extension}"
+
 def get_media_path_prefix():
     """
     Get the media path prefix for fixing image/video sources.
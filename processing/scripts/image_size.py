@@ -0,0 +1,165 @@
+"""
+Photo sizes without opening the whole photo
+
+Reads the width and height of JPEG, PNG, GIF and WebP files from the first
+bytes of the file (no pixels are decoded), and keeps a small index of all
+photo sizes in MEDIA_DIR so later runs don't need to read them again.
+The blog uses the sizes for width/height on <img> tags, so pages don't
+jump around while photos load.
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+from config import *
+
+# Saved in CACHE_DIR between runs
+INDEX_NAME = "image-sizes.json"
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# JPEG markers that carry the frame size (SOF0-SOF15 except DHT, JPG and DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# The index of this run, loaded once
+_index = None
+
+def _jpeg_orientation(exif):
+    """EXIF orientation (1-8) from the body of an APP1 segment, 1 if unknown"""
+    if not exif.startswith(b'Exif\x00\x00') or len(exif) < 14:
+        return 1
+    tiff = exif[6:]
+    byte_order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if not byte_order:
+        return 1
+    ifd_offset = struct.unpack(f'{byte_order}I', tiff[4:8])[0]
+    if ifd_offset + 2 > len(tiff):
+        return 1
+    entry_count = struct.unpack(f'{byte_order}H', tiff[ifd_offset:ifd_offset + 2])[0]
+    for number in range(entry_count):
+        entry = tiff[ifd_offset + 2 + number * 12:ifd_offset + 14 + number * 12]
+        if len(entry) < 12:
+            break
+        tag = struct.unpack(f'{byte_order}H', entry[:2])[0]
+        if tag == 0x0112:
+            return struct.unpack(f'{byte_order}H', entry[8:10])[0]
+    return 1
+
+def _jpeg_size(f):
+    orientation = 1
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        # Skip padding bytes between markers
+        while marker[1] == 0xFF:
+            padding = f.read(1)
+            if not padding:
+                return None
+            marker = marker[1:] + padding
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if code == 0xE1 and orientation == 1:
+            orientation = _jpeg_orientation(f.read(length - 2))
+        elif code in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', f.read(5)[1:5])
+            # Orientations 5-8 are rotated by 90 degrees when shown
+            return (height, width) if orientation >= 5 else (width, height)
+        else:
+            f.seek(length - 2, 1)
+
+def read_image_size(path):
+    """Return (width, height) of a photo from its file header, or None if unknown"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(30)
+
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b'VP8X':
+                    return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+                return None
+            if head[:2] == b'\xff\xd8':
+                return _jpeg_size(f)
+    except (OSError, struct.error, IndexError, ValueError):
+        return None
+    return None
+
+def _scan(directory, media_dir):
+    """Yield (relative path, DirEntry) for every photo below directory"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path, media_dir)
+            elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.relpath(entry.path, media_dir).replace(os.sep, '/'), entry
+
+def build_dimension_index(media_dir=MEDIA_DIR, cache_dir=CACHE_DIR):
+    """
+    Read the size of every photo in media_dir and save the index in cache_dir.
+    Photos with the same file size and time as last run are not opened again.
+    Returns the number of photos in the index.
+    """
+    global _index
+    index_path = os.path.join(cache_dir, INDEX_NAME)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            old_index = json.load(f)
+    except (OSError, ValueError):
+        old_index = {}
+
+    index = {}
+    if os.path.isdir(media_dir):
+        for media_path, entry in _scan(media_dir, media_dir):
+            stat = entry.stat()
+            known = old_index.get(media_path)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+                index[media_path] = known
+                continue
+            size = read_image_size(entry.path)
+            if size:
+                index[media_path] = [stat.st_size, stat.st_mtime, size[0], size[1]]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    _index = index
+    return len(index)
+
+def _current_index():
+    global _index
+    if _index is None:
+        try:
+            with open(os.path.join(CACHE_DIR, INDEX_NAME), 'r', encoding='utf-8') as f:
+                _index = json.load(f)
+        except (OSError, ValueError):
+            _index = {}
+    return _index
+
+def image_dimensions(media_path):
+    """(width, height) of a photo inside MEDIA_DIR, or None if unknown"""
+    known = _current_index().get(media_path)
+    return (known[2], known[3]) if known else None
+
+def dimension_index_fingerprint():
+    """Short hash of all known photo sizes (changes when any photo changes size)"""
+    sizes = sorted((media_path, known[2], known[3]) for media_path, known in _current_index().items())
+    return hashlib.sha256(repr(sizes).encode('utf-8')).hexdigest()
@@ -0,0 +1,153 @@
+"""
+Finding the file behind every media link
+
+Facebook links to photos and videos with paths that don't always match
+where the files ended up in MEDIA_DIR. Instead of guessing from the link
+(and never checking the file is there), build_media_index lists MEDIA_DIR
+once with os.scandir and saves the list in CACHE_DIR. resolve_media_link
+then finds the file for a link with a few dictionary lookups, and says
+when the file is missing or when several files share its name.
+
+On the next run the saved list is reused as long as no folder in MEDIA_DIR
+has changed (one stat per folder instead of listing every file), which
+matters most when the photos are on a network drive.
+"""
+
+import hashlib
+import json
+import os
+from urllib.parse import unquote
+
+from config import *
+
+# Saved in CACHE_DIR between runs
+INDEX_NAME = "media-index.json"
+
+# Links ending in these are reported when their file can't be found
+MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.bmp',
+                    '.mp4', '.mov', '.m4v', '.webm', '.avi', '.3gp')
+
+# Problems resolve_media_link can report
+MISSING = 'missing'
+AMBIGUOUS = 'ambiguous'
+
+# The index of this run, loaded once
+_index = None
+
+class MediaIndex:
+    """
+    The files in MEDIA_DIR. paths holds every path relative to MEDIA_DIR,
+    by_name the paths for each file name. found is False when MEDIA_DIR
+    doesn't exist (then nothing is reported as missing).
+    """
+
+    def __init__(self, paths=(), found=False):
+        self.paths = set(paths)
+        self.found = found
+        self.by_name = {}
+        for media_path in sorted(self.paths):
+            self.by_name.setdefault(media_path.rsplit('/', 1)[-1], []).append(media_path)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _lookup(self, link):
+        """(media path or None, problem or None) for one spelling of a link"""
+        parts = [part for part in link.split('?')[0].split('/') if part and part != '.']
+        if not parts:
+            return None, None
+
+        # The longest end of the link that is a real file
+        # ("your_facebook_activity/posts/media/Album/1.jpg" -> "Album/1.jpg")
+        for start in range(len(parts)):
+            candidate = '/'.join(parts[start:])
+            if candidate in self.paths:
+                return candidate, None
+
+        # Only the file name is left: fine if exactly one file has it
+        same_name = self.by_name.get(parts[-1])
+        if same_name:
+            return same_name[0], (AMBIGUOUS if len(same_name) > 1 else None)
+        return None, MISSING
+
+    def resolve(self, link):
+        """
+        (path inside MEDIA_DIR or None, problem or None) for a link.
+        With several files of the same name the first one (by path) is used
+        and AMBIGUOUS is returned; MISSING means no file could be found.
+        """
+        media_path, problem = self._lookup(link)
+        if media_path is None and '%' in link:
+            media_path, problem = self._lookup(unquote(link))
+        if problem == MISSING and (not self.found or not link.lower().split('?')[0].endswith(MEDIA_EXTENSIONS)):
+            problem = None
+        return media_path, problem
+
+def _scan(directory, media_dir, paths, folders):
+    """Add every file below directory to paths, and every folder's mtime to folders"""
+    folders[os.path.relpath(directory, media_dir).replace(os.sep, '/')] = os.stat(directory).st_mtime_ns
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _scan(entry.path, media_dir, paths, folders)
+            elif entry.is_file():
+                paths.append(os.path.relpath(entry.path, media_dir).replace(os.sep, '/'))
+
+def _unchanged(saved, media_dir):
+    """True when the saved index is for media_dir and none of its folders changed"""
+    if saved.get('media_dir') != os.path.abspath(media_dir):
+        return False
+    try:
+        return all(os.stat(os.path.join(media_dir, folder)).st_mtime_ns == mtime
+                   for folder, mtime in saved['folders'].items())
+    except (OSError, KeyError, AttributeError):
+        return False
+
+def _load_saved(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build_media_index(media_dir=MEDIA_DIR, cache_dir=CACHE_DIR):
+    """
+    List every file in media_dir (or reuse last run's list when no folder
+    changed) and save it in cache_dir. Returns (number of files, True if reused).
+    """
+    global _index
+    index_path = os.path.join(cache_dir, INDEX_NAME)
+    saved = _load_saved(index_path)
+    reused = bool(saved) and os.path.isdir(media_dir) and _unchanged(saved, media_dir)
+
+    if not reused:
+        paths, folders = [], {}
+        if os.path.isdir(media_dir):
+            _scan(media_dir, media_dir, paths, folders)
+        saved = {'media_dir': os.path.abspath(media_dir), 'found': os.path.isdir(media_dir),
+                 'folders': folders, 'files': sorted(paths)}
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f)
+
+    _index = MediaIndex(saved['files'], saved['found'])
+    return len(_index), reused
+
+def _current_index():
+    global _index
+    if _index is None:
+        saved = _load_saved(os.path.join(CACHE_DIR, INDEX_NAME))
+        _index = MediaIndex(saved.get('files', ()), saved.get('found', False))
+    return _index
+
+def resolve_media_link(link):
+    """(path inside MEDIA_DIR or None, problem or None) for a link in the export"""
+    return _current_index().resolve(link)
+
+def media_files():
+    """Every file in MEDIA_DIR (paths inside it), in order"""
+    return sorted(_current_index().paths)
+
+def media_index_fingerprint():
+    """Short hash of all file paths in MEDIA_DIR (changes when files are added, moved or removed)"""
+    return hashlib.sha256(repr(sorted(_current_index().paths)).encode('utf-8')).hexdigest()
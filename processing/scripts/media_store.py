@@ -0,0 +1,210 @@
+"""
+One copy of every photo and video
+
+Facebook often exports the same photo several times under different names
+(in a post, in "Mobile uploads", as a profile or cover photo). This file
+stores each distinct file once in DEDUP_MEDIA_DIR, named after a hash of
+its contents (e.g. media/3f9a...e1.jpg), and the blog links to those.
+Because a name always means the same contents, web servers and CDNs can
+cache them forever.
+
+Finding duplicates is kept cheap: only files of the same size can be the
+same, and of those only files whose first and last bytes match are read
+in full before copying. Hashes are remembered in CACHE_DIR, so unchanged
+files are not read again on the next run.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from config import *
+
+# Saved in CACHE_DIR between runs: media path -> [size, mtime, sha256]
+HASHES_NAME = "media-hashes.json"
+
+# How much of the start and the end of a file is compared before reading all of it
+PARTIAL_BYTES = 64 * 1024
+
+# Length of the hash part of stored file names (hex characters)
+NAME_LENGTH = 32
+
+# The media path -> stored name table of this run, loaded once
+_store = None
+
+def media_store_enabled():
+    return bool(DEDUPLICATE_MEDIA)
+
+def stored_name(content_hash, media_path):
+    """Name of a file in the store: hash plus the original extension"""
+    extension = os.path.splitext(media_path)[1].lower()
+    return f"{content_hash[:NAME_LENGTH]}{extension}"
+
+def _scan(directory, media_dir):
+    """Yield (media path, DirEntry) for every file below directory"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path, media_dir)
+            elif entry.is_file():
+                yield os.path.relpath(entry.path, media_dir).replace(os.sep, '/'), entry
+
+def _partial_hash(path, size):
+    """Hash of the first and last PARTIAL_BYTES of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+        digest.update(f.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+def _full_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _copy_and_hash(source, store_dir):
+    """Copy a file into the store while hashing it (one read); returns its hash"""
+    digest = hashlib.sha256()
+    handle, temporary = tempfile.mkstemp(dir=store_dir, prefix='.incoming-')
+    try:
+        with open(source, 'rb') as f, os.fdopen(handle, 'wb') as out:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+                out.write(block)
+        content_hash = digest.hexdigest()
+        target = os.path.join(store_dir, stored_name(content_hash, source))
+        if os.path.exists(target):
+            os.remove(temporary)
+        else:
+            os.replace(temporary, target)
+        return content_hash
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+def _store_copy(source, content_hash, store_dir):
+    """Put a file with a known hash into the store (a hard link when possible)"""
+    target = os.path.join(store_dir, stored_name(content_hash, source))
+    if os.path.exists(target):
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+def _load_hashes(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build_media_store(media_dir=MEDIA_DIR, store_dir=DEDUP_MEDIA_DIR, cache_dir=CACHE_DIR):
+    """
+    Copy every distinct file in media_dir into store_dir once, under its hash.
+    With store_dir None the files are only hashed (site_archive.py then packs
+    them straight from media_dir).
+    Returns (files, distinct files, bytes saved by not copying duplicates).
+    """
+    global _store
+    hashes_path = os.path.join(cache_dir, HASHES_NAME)
+    old_hashes = _load_hashes(hashes_path)
+    if store_dir is not None:
+        os.makedirs(store_dir, exist_ok=True)
+
+    files = {}
+    if os.path.isdir(media_dir):
+        for media_path, entry in _scan(media_dir, media_dir):
+            stat = entry.stat()
+            files[media_path] = (entry.path, stat.st_size, stat.st_mtime)
+
+    hashes = {}
+    changed = []
+    for media_path, (path, size, mtime) in files.items():
+        known = old_hashes.get(media_path)
+        if known and known[0] == size and known[1] == mtime:
+            hashes[media_path] = known
+        else:
+            changed.append(media_path)
+
+    # Only files of the same size can be duplicates...
+    by_size = {}
+    for media_path, (path, size, mtime) in files.items():
+        by_size.setdefault(size, []).append(media_path)
+
+    # ...and of those, only the ones that start and end the same
+    partials = {}
+    def partial_hash(media_path):
+        if media_path not in partials:
+            path, size, _ = files[media_path]
+            partials[media_path] = _partial_hash(path, size)
+        return partials[media_path]
+
+    candidates = set()
+    for media_path in changed:
+        group = by_size[files[media_path][1]]
+        if len(group) > 1 and any(other != media_path and partial_hash(other) == partial_hash(media_path) for other in group):
+            candidates.add(media_path)
+
+    for media_path in changed:
+        path, size, mtime = files[media_path]
+        if store_dir is None:
+            content_hash = _full_hash(path)
+        elif media_path in candidates:
+            # Probably a duplicate: hash first, copy only if it is new
+            content_hash = _full_hash(path)
+            _store_copy(path, content_hash, store_dir)
+        else:
+            content_hash = _copy_and_hash(path, store_dir)
+        hashes[media_path] = [size, mtime, content_hash]
+
+    # Files kept from last run must still be in the store (it may have been deleted)
+    for media_path, known in hashes.items():
+        if store_dir is not None and media_path not in changed:
+            _store_copy(files[media_path][0], known[2], store_dir)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(hashes_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f)
+    _store = {media_path: stored_name(known[2], media_path) for media_path, known in hashes.items()}
+
+    distinct = {}
+    for media_path, known in hashes.items():
+        distinct.setdefault(known[2], known[0])
+    saved = sum(known[0] for known in hashes.values()) - sum(distinct.values())
+    return len(hashes), len(distinct), saved
+
+def _current_store():
+    """media path -> stored name, from the hashes saved by build_media_store"""
+    global _store
+    if _store is None:
+        hashes = _load_hashes(os.path.join(CACHE_DIR, HASHES_NAME))
+        _store = {media_path: stored_name(known[2], media_path) for media_path, known in hashes.items()}
+    return _store
+
+def stored_files():
+    """Stored name -> one media path with those contents"""
+    files = {}
+    for media_path, name in sorted(_current_store().items()):
+        files.setdefault(name, media_path)
+    return files
+
+def stored_media_link(media_path):
+    """Link to the stored copy of a file inside MEDIA_DIR, or None"""
+    if not media_store_enabled():
+        return None
+    name = _current_store().get(media_path)
+    return f"{RELATIVE_DEDUP_MEDIA_PATH}/{name}" if name else None
+
+def media_store_fingerprint():
+    """Short hash of all stored names (None when switched off)"""
+    if not media_store_enabled():
+        return None
+    return hashlib.sha256(repr(sorted(_current_store().items())).encode('utf-8')).hexdigest()
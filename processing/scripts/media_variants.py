@@ -0,0 +1,202 @@
+"""
+Smaller copies of your photos for the blog
+
+Facebook exports contain full-size photos. This file makes downscaled
+versions (WebP by default) of every photo in MEDIA_DIR, so the blog pages
+only load what the screen needs. The full photo is still one click away.
+
+Needs the Pillow package (pip3 install Pillow). Without it the blog simply
+keeps using the original photos.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from config import *
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Photo types we make smaller copies of (GIFs may be animated, so they are left alone)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Remembers which photos were already done, stored in IMAGE_VARIANTS_DIR
+MANIFEST_NAME = "manifest.json"
+
+# The manifest of this run, loaded once
+_manifest = None
+
+def responsive_images_enabled():
+    """True when smaller photo copies are switched on and Pillow is installed"""
+    return bool(RESPONSIVE_IMAGES) and Image is not None
+
+def variant_name(media_path, width, image_format=None):
+    """Relative name of one smaller copy, e.g. album/photo.jpg -> album/photo-480w.webp"""
+    base = os.path.splitext(media_path)[0]
+    return f"{base}-{width}w.{image_format or IMAGE_VARIANT_FORMAT}"
+
+def _listed_variants(manifest):
+    """Relative names of every smaller copy the manifest knows about"""
+    names = set()
+    for media_path, record in manifest.items():
+        widths, image_format = record['settings'][0], record['settings'][1]
+        names.update(variant_name(media_path, width, image_format) for width in widths)
+    return names
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _current_manifest():
+    """The list of photos that have smaller copies"""
+    global _manifest
+    if _manifest is None:
+        _manifest = _load_manifest(os.path.join(IMAGE_VARIANTS_DIR, MANIFEST_NAME))
+    return _manifest
+
+def variant_files():
+    """Relative names (inside IMAGE_VARIANTS_DIR) of the smaller copies made for the current photos"""
+    return sorted(_listed_variants(_current_manifest()))
+
+def _remove_unlisted(output_dir, manifest):
+    """Delete copies of photos that are gone or made with other settings; returns how many"""
+    listed = _listed_variants(manifest)
+    removed = 0
+    for root, _, files in os.walk(output_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, output_dir).replace(os.sep, '/')
+            if relative != MANIFEST_NAME and relative not in listed:
+                os.remove(path)
+                removed += 1
+        if root != output_dir and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+def variants_fingerprint():
+    """Short hash of which photos have smaller copies (None when switched off)"""
+    if not responsive_images_enabled():
+        return None
+    return hashlib.sha256('\n'.join(sorted(_current_manifest())).encode('utf-8')).hexdigest()
+
+def responsive_image_attrs(media_path):
+    """
+    New <img> attributes (src, srcset, sizes) for a photo inside MEDIA_DIR.
+    Returns None for photos that have no smaller copies.
+    """
+    if media_path not in _current_manifest():
+        return None
+
+    widths = sorted(IMAGE_WIDTHS)
+    srcset = ', '.join(
+        f"{RELATIVE_IMAGE_VARIANTS_PATH}/{variant_name(media_path, width)} {width}w"
+        for width in widths
+    )
+    return {
+        'src': f"{RELATIVE_IMAGE_VARIANTS_PATH}/{variant_name(media_path, widths[-1])}",
+        'srcset': srcset,
+        'sizes': f"(max-width: {widths[-1]}px) 100vw, {widths[-1]}px",
+    }
+
+def _file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _make_variants(source, media_path, output_dir, widths, image_format):
+    """Write every smaller copy of one photo (runs in a worker process)"""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        for width in widths:
+            target = os.path.join(output_dir, variant_name(media_path, width))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            copy = image.copy()
+            # Never make a photo bigger than the original
+            copy.thumbnail((width, width * 10))
+            copy.save(target, image_format.upper(), quality=IMAGE_VARIANT_QUALITY)
+
+def build_image_variants(media_dir=MEDIA_DIR, output_dir=IMAGE_VARIANTS_DIR):
+    """
+    Make the smaller copies for every photo in media_dir, using several processes.
+    Photos whose contents have not changed since the last run are skipped.
+    Returns (made, skipped).
+    """
+    global _manifest
+    if not responsive_images_enabled():
+        return 0, 0
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+    settings = [sorted(IMAGE_WIDTHS), IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY]
+
+    jobs = []
+    skipped = 0
+    seen = set()
+    for root, _, files in os.walk(media_dir):
+        for name in files:
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            media_path = os.path.relpath(source, media_dir).replace(os.sep, '/')
+            seen.add(media_path)
+            stat = os.stat(source)
+            known = manifest.get(media_path)
+
+            # Same size and time as last run: nothing to do
+            if known and known['settings'] == settings and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime:
+                skipped += 1
+                continue
+
+            # Touched but not changed: only remember the new time
+            content_hash = _file_hash(source)
+            if known and known['settings'] == settings and known['sha256'] == content_hash:
+                known.update(size=stat.st_size, mtime=stat.st_mtime)
+                skipped += 1
+                continue
+
+            jobs.append((source, media_path, {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': content_hash,
+                'settings': settings,
+            }))
+
+    # Forget photos that are no longer in media_dir
+    manifest = {media_path: record for media_path, record in manifest.items() if media_path in seen}
+
+    made = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [
+                (pool.submit(_make_variants, source, media_path, output_dir, settings[0], IMAGE_VARIANT_FORMAT), media_path, record)
+                for source, media_path, record in jobs
+            ]
+            for future, media_path, record in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Could not resize {media_path}: {e}")
+                    continue
+                manifest[media_path] = record
+                made += 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    _manifest = manifest
+    _remove_unlisted(output_dir, manifest)
+
+    return made, skipped
@@ -0,0 +1,174 @@
+"""
+Run timings for Facebook Export to Blog Converter
+
+RunMetrics collects how long each stage of a run takes (wall clock and
+CPU), how many sections were read and which sections were slowest. Worker
+processes fill in their own RunMetrics, which are merged into the main one.
+Progress shows a one-line progress bar with an estimate of the time left.
+"""
+
+import heapq
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+def peak_rss_kb():
+    """Highest memory use of this process and its workers (None where unknown)"""
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    scale = 1024 if sys.platform == 'darwin' else 1
+    return {'main': own // scale, 'workers': workers // scale}
+
+def format_seconds(seconds):
+    """1m 05s style durations"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+class RunMetrics:
+    """Stage timings, section throughput and the slowest sections of one run"""
+
+    def __init__(self, slowest=10):
+        self.stages = {}      # name -> {'wall': seconds, 'cpu': seconds or None, 'calls': count}
+        self.sections = 0
+        self.keep = slowest
+        self.slowest = []     # heap of (seconds, number, details), smallest first
+        self._numbered = 0
+        self.started = time.time()
+
+    def add_time(self, name, wall, cpu=None):
+        stage = self.stages.setdefault(name, {'wall': 0.0, 'cpu': None, 'calls': 0})
+        stage['wall'] += wall
+        stage['calls'] += 1
+        if cpu is not None:
+            stage['cpu'] = (stage['cpu'] or 0.0) + cpu
+
+    @contextmanager
+    def stage(self, name):
+        """Time the code in a with block (wall clock and CPU)"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_section(self, seconds, **details):
+        """Count one section and remember it if it is one of the slowest"""
+        self.sections += 1
+        self._remember(seconds, details)
+
+    def _remember(self, seconds, details):
+        if not self.keep:
+            return
+        # The number only keeps heap entries with equal times comparable
+        self._numbered += 1
+        entry = (seconds, self._numbered, details)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def merge(self, other):
+        """Add the numbers from another RunMetrics (from a worker process)"""
+        for name, stage in other.stages.items():
+            mine = self.stages.setdefault(name, {'wall': 0.0, 'cpu': None, 'calls': 0})
+            mine['wall'] += stage['wall']
+            mine['calls'] += stage['calls']
+            if stage['cpu'] is not None:
+                mine['cpu'] = (mine['cpu'] or 0.0) + stage['cpu']
+        self.sections += other.sections
+        for seconds, _, details in other.slowest:
+            self._remember(seconds, details)
+
+    def report(self, throughput_stage='filter'):
+        """Everything as a dict that can be saved as JSON"""
+        filter_wall = self.stages.get(throughput_stage, {}).get('wall')
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'total_seconds': round(time.time() - self.started, 3),
+            'sections': self.sections,
+            'sections_per_second': round(self.sections / filter_wall, 1) if filter_wall else None,
+            'peak_rss_kb': peak_rss_kb(),
+            'stages': {
+                name: {
+                    'wall_seconds': round(stage['wall'], 4),
+                    'cpu_seconds': round(stage['cpu'], 4) if stage['cpu'] is not None else None,
+                    'calls': stage['calls'],
+                }
+                for name, stage in self.stages.items()
+            },
+            'slowest_sections': [
+                dict(details, seconds=round(seconds, 4))
+                for seconds, _, details in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+    def print_report(self):
+        report = self.report()
+        print("\n⏱️  Run profile")
+        print(f"  {'stage':<16} {'wall':>9} {'cpu':>9} {'calls':>8}")
+        for name, stage in report['stages'].items():
+            cpu = f"{stage['cpu_seconds']:.3f}s" if stage['cpu_seconds'] is not None else "-"
+            print(f"  {name:<16} {stage['wall_seconds']:>8.3f}s {cpu:>9} {stage['calls']:>8}")
+        if report['sections_per_second']:
+            print(f"  Sections: {report['sections']} ({report['sections_per_second']:,} per second)")
+        if report['peak_rss_kb']:
+            memory = report['peak_rss_kb']
+            print(f"  Peak memory: {memory['main']:,} KB (workers: {memory['workers']:,} KB)")
+        if report['slowest_sections']:
+            print(f"  Slowest {len(report['slowest_sections'])} sections:")
+            for entry in report['slowest_sections']:
+                title = f" {entry['title']}" if entry.get('title') else ""
+                print(f"    {entry['seconds'] * 1000:8.1f} ms  {entry['file']} #{entry['section']}{title}")
+
+    def write_json(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+class Progress:
+    """One-line progress with an estimate of the time left (only shown in a terminal)"""
+
+    def __init__(self, total, label, enabled=True, every=0.5):
+        self.total = total
+        self.label = label
+        self.enabled = enabled and total > 0 and sys.stderr.isatty()
+        self.every = every
+        self.started = time.perf_counter()
+        self.shown = 0.0
+
+    def update(self, done, sections):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self.shown < self.every:
+            return
+        self.shown = now
+        elapsed = now - self.started
+        fraction = min(done / self.total, 1.0)
+        rate = sections / elapsed if elapsed else 0
+        eta = format_seconds(elapsed / fraction - elapsed) if fraction else "?"
+        sys.stderr.write(f"\r{self.label}: {fraction:4.0%} ({sections:,} sections, {rate:,.0f}/s, about {eta} left)  ")
+        sys.stderr.flush()
+
+    def finish(self):
+        if self.enabled and self.shown:
+            sys.stderr.write("\r" + " " * 79 + "\r")
+            sys.stderr.flush()
@@ -0,0 +1,46 @@
+"""
+A finished blog post
+
+Once a section has been cleaned and rendered, only a few small values and
+the finished HTML are needed to write the blog. Post keeps just those (in
+__slots__, so there is no per-post dict), which lets the parsed section be
+thrown away straight after it is rendered.
+"""
+
+class Post:
+    """
+    date: "YYYY-MM-DD"           timestamp: datetime of the post
+    title: cleaned title         slug: filename-safe title ("" when empty)
+    type: 'status', 'photo' or 'video'
+    html: the rendered <article> block
+    photo_only: True when the post has no text or caption
+    media: paths (inside MEDIA_DIR) of the photos and videos the post shows
+    media_problems: (link, 'missing' or 'ambiguous') for media files that weren't found
+    source, offset, content_hash: export file name, byte offset of the section
+    in it (None when not known) and SHA-256 of the section's HTML
+    """
+    __slots__ = ('date', 'timestamp', 'title', 'slug', 'type', 'html', 'photo_only', 'media',
+                 'media_problems', 'source', 'offset', 'content_hash')
+
+    def __init__(self, date, timestamp, title, slug, type, html, photo_only, media=(), media_problems=(),
+                 source=None, offset=None, content_hash=None):
+        self.date = date
+        self.timestamp = timestamp
+        self.title = title
+        self.slug = slug
+        self.type = type
+        self.html = html
+        self.photo_only = photo_only
+        self.media = media
+        self.media_problems = media_problems
+        self.source = source
+        self.offset = offset
+        self.content_hash = content_hash
+
+    @property
+    def blog_title(self):
+        """Heading shown above the post: the date and the slug"""
+        return f"{self.date}-{self.slug}" if self.slug else self.date
+
+    def __repr__(self):
+        return f"Post({self.blog_title!r}, {self.type!r})"
@@ -0,0 +1,167 @@
+"""
+A small database of every post
+
+The converter forgets the posts once the blog is written. With
+POST_INDEX_FILE set, PostIndexWriter also saves one row per post in a
+SQLite file: date, type, title, slug, the photos and videos it shows, a
+hash of its HTML and where it is in the export. Questions like "all video
+posts from 2019" or "which posts show this photo" are then quick lookups
+(see find_posts, or: fbblog.py posts --type video --year 2019).
+The database is made again on every full run and replaced in one go, so it
+is never half-written. Runs limited to some dates (--since, --until,
+--since-last-run) only see part of the posts, so they update the existing
+database instead: every post dated inside the range is replaced by what
+the run found (so edited and deleted posts don't linger), the rest are kept.
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from config import *
+
+SCHEMA = """
+CREATE TABLE posts (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,           -- YYYY-MM-DD
+    timestamp TEXT NOT NULL,      -- YYYY-MM-DD HH:MM:SS
+    type TEXT NOT NULL,           -- status, photo or video
+    title TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    photo_only INTEGER NOT NULL,
+    content_hash TEXT,            -- SHA-256 of the section's HTML in the export
+    source_file TEXT,
+    source_offset INTEGER         -- byte where the section starts in source_file
+);
+CREATE TABLE post_media (
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    media_path TEXT NOT NULL      -- path inside MEDIA_DIR
+);
+CREATE INDEX posts_by_type ON posts(type, timestamp);
+CREATE INDEX posts_by_time ON posts(timestamp);
+CREATE INDEX posts_by_hash ON posts(content_hash);
+CREATE INDEX media_by_path ON post_media(media_path);
+"""
+
+# Rows are written to the database in batches of this many posts
+BATCH_SIZE = 1000
+
+class PostIndexWriter:
+    """
+    Saves posts to a new index at path; the old one is replaced on close.
+    With date_range (a DateRange), the index already at path is updated
+    instead (in one transaction): its posts inside the range are replaced.
+    """
+
+    def __init__(self, path, date_range=None):
+        self.path = path
+        self.posts = []
+        self.update = bool(date_range) and os.path.exists(path)
+        if self.update:
+            self.partial = None
+            self.db = sqlite3.connect(path)
+            self._remove_range(date_range)
+            self.last_id = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM posts").fetchone()[0]
+            return
+        
+        self.partial = f"{path}.partial"
+        if os.path.exists(self.partial):
+            os.remove(self.partial)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(self.partial)
+        # Nothing to protect until the file replaces the old index
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.executescript(SCHEMA)
+        self.last_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(keep=exc_type is None)
+
+    def add(self, post):
+        self.posts.append(post)
+        if len(self.posts) >= BATCH_SIZE:
+            self._flush()
+
+    def _remove_range(self, date_range):
+        """Delete the saved posts dated inside date_range (this run saves them again)"""
+        conditions = []
+        values = []
+        if date_range.start is not None:
+            conditions.append("timestamp >= ?")
+            values.append(date_range.start.strftime('%Y-%m-%d %H:%M:%S'))
+        if date_range.end is not None:
+            conditions.append("timestamp < ?")
+            values.append(date_range.end.strftime('%Y-%m-%d %H:%M:%S'))
+        where = ' AND '.join(conditions)
+        self.db.execute(f"DELETE FROM post_media WHERE post_id IN (SELECT id FROM posts WHERE {where})", values)
+        self.db.execute(f"DELETE FROM posts WHERE {where}", values)
+
+    def _flush(self):
+        first_id = self.last_id + 1
+        self.db.executemany(
+            "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(first_id + number, post.date, post.timestamp.strftime('%Y-%m-%d %H:%M:%S'), post.type,
+              post.title, post.slug, int(post.photo_only), post.content_hash, post.source, post.offset)
+             for number, post in enumerate(self.posts)])
+        self.db.executemany(
+            "INSERT INTO post_media VALUES (?, ?)",
+            [(first_id + number, media_path)
+             for number, post in enumerate(self.posts) for media_path in post.media])
+        self.last_id += len(self.posts)
+        self.posts = []
+
+    def close(self, keep=True):
+        """Write what is left and put the new index in place (or throw it away)"""
+        if self.db is None:
+            return
+        if keep:
+            self._flush()
+            self.db.commit()
+        else:
+            self.db.rollback()
+        self.db.close()
+        self.db = None
+        if self.update:
+            return
+        if keep:
+            os.replace(self.partial, self.path)
+        else:
+            os.remove(self.partial)
+
+def find_posts(path=POST_INDEX_FILE, post_type=None, year=None, media_path=None):
+    """
+    Rows (as dicts, oldest first) of the posts matching every given filter:
+    post_type ('status', 'photo', 'video'), year (e.g. 2019) and media_path
+    (a photo or video inside MEDIA_DIR). Each row lists the post's media too.
+    """
+    conditions = []
+    values = []
+    if post_type:
+        conditions.append("type = ?")
+        values.append(post_type)
+    if year:
+        # A range, so the timestamp index can be used
+        conditions.append("timestamp >= ? AND timestamp < ?")
+        values += [f"{int(year):04d}", f"{int(year) + 1:04d}"]
+    if media_path:
+        conditions.append("id IN (SELECT post_id FROM post_media WHERE media_path = ?)")
+        values.append(media_path)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Read-only, so a missing file is an error instead of a new empty database
+    with closing(sqlite3.connect(f"{Path(path).absolute().as_uri()}?mode=ro", uri=True)) as db:
+        db.row_factory = sqlite3.Row
+        rows = [dict(row) for row in db.execute(f"SELECT * FROM posts {where} ORDER BY timestamp, id", values)]
+        media = {}
+        for post_id, path_of_media in db.execute(
+                f"SELECT post_id, media_path FROM post_media WHERE post_id IN (SELECT id FROM posts {where}) ORDER BY rowid",
+                values):
+            media.setdefault(post_id, []).append(path_of_media)
+    for row in rows:
+        row['media'] = media.get(row['id'], [])
+    return rows
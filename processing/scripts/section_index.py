@@ -0,0 +1,86 @@
+"""
+A saved list of the sections in an export
+
+The helper commands (analyze, count, debug, extract) used to load the whole
+export into BeautifulSoup every time they ran. get_section_index scans the
+export once through a memory map, without building any parse tree, and
+saves in CACHE_DIR where each section sits in the file (byte offsets), its
+header lines and its date. Later runs just read that list, and sections
+that are needed in full are read straight from their offsets.
+The list is made again when the export file changes (size or time).
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from config import *
+from classifier import HEADER_CLASSES
+from metrics import Progress
+from section_stream import FOOTER_DATE, map_export, raw_headers, section_offsets
+
+# Bump when the saved entries change shape
+INDEX_VERSION = 2
+
+# Folder inside CACHE_DIR with one index per export file
+INDEX_DIR_NAME = "sections"
+
+# One section: byte offsets in the export, header lines (as shown) and date text ('' if none)
+SectionEntry = namedtuple('SectionEntry', 'start end headers date')
+
+def header_text(entry):
+    """The joined, lowercased headers, as PostClassifier.classify expects them"""
+    return ' '.join(entry.headers).lower()
+
+def _index_path(input_file, cache_dir):
+    name = hashlib.sha256(os.path.abspath(input_file).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, INDEX_DIR_NAME, f"{name}.json")
+
+def _describe(data, start, end):
+    """What the helper commands need from one section of the mapped export"""
+    headers = raw_headers(data[start:end].decode('utf-8', 'replace'), HEADER_CLASSES)
+    date = FOOTER_DATE.search(data, start, end)
+    return SectionEntry(start, end, headers, date.group(1).decode('utf-8', 'replace').strip() if date else '')
+
+def get_section_index(input_file, cache_dir=CACHE_DIR):
+    """
+    The SectionEntry of every section in input_file, from the saved index
+    when the file hasn't changed. Returns (entries, True if the saved index was used).
+    """
+    stat = os.stat(input_file)
+    index_path = _index_path(input_file, cache_dir)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved['version'] == INDEX_VERSION and saved['size'] == stat.st_size and saved['mtime'] == stat.st_mtime_ns:
+            return [SectionEntry(*entry) for entry in saved['sections']], True
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    # One pass over the mapped file, no parsing
+    entries = []
+    progress = Progress(stat.st_size, f"Indexing {os.path.basename(input_file)}", enabled=SHOW_PROGRESS)
+    with map_export(input_file) as data:
+        for start, end in section_offsets(data):
+            entries.append(_describe(data, start, end))
+            progress.update(end, len(entries))
+    progress.finish()
+
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                   'sections': [list(entry) for entry in entries]}, f)
+    return entries, False
+
+def classify_entries(entries, post_classifier):
+    """Yield (entry, post type or None) for every entry"""
+    for entry in entries:
+        yield entry, post_classifier.classify(header_text(entry))
+
+def iter_section_html(input_file, entries):
+    """Yield the HTML of each entry, read straight from its offsets"""
+    with open(input_file, 'rb') as f:
+        for entry in entries:
+            f.seek(entry.start)
+            yield f.read(entry.end - entry.start).decode('utf-8', 'replace')
@@ -0,0 +1,183 @@
+"""
+Streaming reader for Facebook HTML exports.
+
+Instead of loading the whole export into memory and building one big
+BeautifulSoup tree, these functions read the file in chunks and hand back
+one <section class="_a6-g"> at a time. Memory use stays around the size of
+the largest single post, no matter how big the export file is.
+"""
+
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from html import unescape
+
+# How much of the file to read at a time (in bytes)
+CHUNK_SIZE = 1024 * 1024
+
+# Opening or closing <section> tags (group 1 is "/" for closing tags)
+SECTION_TAG = re.compile(rb'<(/?)section\b[^>]*>', re.IGNORECASE)
+
+# The class Facebook puts on every post section
+POST_CLASS = re.compile(rb'class\s*=\s*["\'][^"\']*(?<![\w-])_a6-g(?![\w-])')
+
+STYLE_BLOCK = re.compile(rb'<style[^>]*>(.*?)</style>', re.DOTALL)
+
+# The date under a post: <div class="_a72d">Aug 09, 2025 9:48:19 am</div>
+FOOTER_DATE = re.compile(rb'<div class="_a72d">([^<]*)</div>')
+FOOTER_DATE_TEXT = re.compile(FOOTER_DATE.pattern.decode('ascii'))  # the same, for decoded text
+
+# Date detection reads at most this much of the start of an export, and keeps
+# this much of each chunk for a date that is split between two chunks
+FOOTER_SAMPLE_BYTES = 16 * 1024 * 1024
+FOOTER_TAIL_BYTES = 1024
+
+# Header lines of a post: <h2 class="_2ph_ _a6-h _a6-i">Ellie Ellie added a new photo.</h2>
+HEADER_TAG = re.compile(r'<h2\b([^>]*)>(.*?)</h2\s*>', re.DOTALL | re.IGNORECASE)
+CLASS_VALUE = re.compile(r"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+ANY_TAG = re.compile(r'<[^>]*>')
+
+@contextmanager
+def map_export(input_file):
+    """
+    The whole export as one read-only memory map (b'' for an empty file).
+    The operating system pages it in as it is scanned, so nothing is copied
+    into Python and the regular expressions run at close to disk speed.
+    """
+    with open(input_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+class _SectionScanner:
+    """
+    Where post sections start and end, the same for every reader: feed it
+    each SECTION_TAG match in file order and it returns (start, end) file
+    offsets when a post section closes. <section>s nested inside a post
+    belong to that post.
+    """
+
+    def __init__(self):
+        self.depth = 0      # nesting level of <section> tags inside a post
+        self.start = None   # file offset where the current post began
+
+    def feed(self, match, base=0):
+        """Take one match; base is the file offset of the text it was found in"""
+        if match.group(1):
+            # Closing </section>
+            if self.start is not None:
+                self.depth -= 1
+                if self.depth == 0:
+                    span = self.start, base + match.end()
+                    self.start = None
+                    return span
+        elif self.start is not None:
+            # A <section> nested inside a post
+            self.depth += 1
+        elif POST_CLASS.search(match.group(0)):
+            self.start = base + match.start()
+            self.depth = 1
+        return None
+
+def section_offsets(data):
+    """Yield (start, end) byte offsets of every post section in data (bytes or a map_export)"""
+    scanner = _SectionScanner()
+    for match in SECTION_TAG.finditer(data):
+        span = scanner.feed(match)
+        if span:
+            yield span
+
+def raw_headers(section_html, header_classes):
+    """
+    The text of every <h2> in section_html that has one of header_classes,
+    as BeautifulSoup's get_text() gives it, but found without parsing.
+    """
+    headers = []
+    for match in HEADER_TAG.finditer(section_html):
+        value = CLASS_VALUE.search(match.group(1))
+        classes = (value.group(1) or value.group(2) or value.group(3) or '').split() if value else ()
+        if any(name in header_classes for name in classes):
+            headers.append(unescape(ANY_TAG.sub('', match.group(2))))
+    return headers
+
+def iter_raw_sections(input_file, chunk_size=CHUNK_SIZE):
+    """
+    Yield (start, end, raw_html) for every post section in the export.
+
+    start/end are byte offsets into the file and raw_html is the bytes of
+    the whole <section>...</section> element.
+    """
+    with open(input_file, 'rb') as f:
+        buffer = b''
+        base = 0      # file offset of buffer[0]
+        pos = 0       # where to continue searching in the buffer
+        scanner = _SectionScanner()
+
+        while True:
+            match = SECTION_TAG.search(buffer, pos)
+
+            if match is None:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+
+                # Keep the current post (or a tag that may be cut in half), drop the rest
+                if scanner.start is not None:
+                    keep = scanner.start - base
+                else:
+                    keep = buffer.rfind(b'<', pos)
+                    if keep == -1:
+                        keep = len(buffer)
+
+                buffer = buffer[keep:] + chunk
+                base += keep
+                pos = max(pos - keep, 0)
+                continue
+
+            pos = match.end()
+            span = scanner.feed(match, base)
+            if span:
+                start, end = span
+                yield start, end, buffer[start - base:end - base]
+
+def read_original_css(input_file, chunk_size=CHUNK_SIZE):
+    """Return the first <style> block of the export without reading the whole file"""
+    buffer = b''
+    with open(input_file, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+
+            css_match = STYLE_BLOCK.search(buffer)
+            if css_match:
+                return css_match.group(1).decode('utf-8', errors='replace')
+
+            # The stylesheet lives in <head>, so stop once the posts start
+            if not chunk or b'<section' in buffer:
+                return ""
+
+def read_footer_dates(input_file, limit=20, chunk_size=CHUNK_SIZE, max_bytes=FOOTER_SAMPLE_BYTES):
+    """
+    Return the first few post dates of the export (as text), reading only
+    the start of the file (at most max_bytes, one chunk in memory at a time).
+    """
+    dates = []
+    with open(input_file, 'rb') as f:
+        buffer = b''
+        read = 0
+        while len(dates) < limit and read < max_bytes:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            read += len(chunk)
+            buffer += chunk
+            end = 0
+            for match in FOOTER_DATE.finditer(buffer):
+                dates.append(match.group(1))
+                end = match.end()
+            # Only the end of the buffer is kept, in case a date was cut in half
+            buffer = buffer[max(end, len(buffer) - FOOTER_TAIL_BYTES):]
+    return [date.decode('utf-8', errors='replace') for date in dates[:limit]]
@@ -0,0 +1,176 @@
+"""
+The finished blog as one zip or tar.gz file
+
+With OUTPUT_ARCHIVE set, pages are written straight into the archive as
+they are made, and photos and videos are copied in from where they already
+are. Nothing is written to OUTPUT_DIR first just to be read back and packed
+afterwards. Photos and videos are already compressed, so a zip stores them
+as they are (compressing them again only costs time).
+
+Files go where the blog's links expect them: pages in a folder named like
+OUTPUT_DIR, and media paths such as "../input/media" are followed from
+there. Unpacking the archive gives a blog that works as it is.
+"""
+
+import gzip
+import io
+import os
+import posixpath
+import tarfile
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+
+from config import *
+from blog_writer import output_path
+from helper import get_site_archive_filename
+from media_index import build_media_index, media_files
+from media_store import stored_files
+from media_variants import responsive_images_enabled, variant_files
+
+# Archive types and their file extensions
+ARCHIVE_EXTENSIONS = {'zip': '.zip', 'tar.gz': '.tar.gz'}
+
+# Already compressed: put into zips as they are
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic',
+                     '.mp4', '.mov', '.m4v', '.webm', '.3gp', '.gz', '.zip')
+
+# A tar needs each file's size before its contents, so pages for a tar.gz are
+# kept in memory up to this size (in bytes) and in a temporary file after that
+SPOOL_BYTES = 16 * 1024 * 1024
+
+class SiteArchive:
+    """
+    A zip or tar.gz being filled with the blog. It is written under a
+    temporary name and only renamed to path when closed without an error.
+    site_dir is the folder the pages would normally be saved in.
+    """
+
+    def __init__(self, path, archive_format, site_dir=OUTPUT_DIR):
+        if archive_format not in ARCHIVE_EXTENSIONS:
+            raise ValueError(f"OUTPUT_ARCHIVE must be one of {', '.join(ARCHIVE_EXTENSIONS)}, not {archive_format!r}")
+        self.path = path
+        self.format = archive_format
+        self.site_dir = site_dir
+        self.site = os.path.basename(os.path.normpath(site_dir))
+        self.names = set()
+        self.partial = f"{path}.partial"
+        if archive_format == 'zip':
+            self.archive = zipfile.ZipFile(self.partial, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        else:
+            self.archive = tarfile.open(self.partial, 'w:gz')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(keep=exc_type is None)
+
+    def member_name(self, link):
+        """Name in the archive of a file the pages link to as link (None if it would be outside)"""
+        name = posixpath.normpath(posixpath.join(self.site, link))
+        if name == '..' or name.startswith(('../', '/')):
+            return None
+        return name
+
+    def _claim(self, name):
+        """False when name is already in the archive"""
+        if name in self.names:
+            return False
+        self.names.add(name)
+        return True
+
+    @contextmanager
+    def open_text(self, output_file, compress=False):
+        """Write a page that would be saved as output_file (see open_output)"""
+        path = output_path(output_file, compress)
+        name = self.member_name(os.path.relpath(path, self.site_dir).replace(os.sep, '/'))
+        if name is None or not self._claim(name):
+            raise ValueError(f"Can't add {path} to the archive")
+
+        if self.format == 'zip':
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED if compress else zipfile.ZIP_DEFLATED
+            raw = self.archive.open(info, 'w', force_zip64=True)
+        else:
+            raw = tempfile.SpooledTemporaryFile(SPOOL_BYTES)
+        binary = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+        text = io.TextIOWrapper(binary, encoding='utf-8')
+        try:
+            yield text
+        finally:
+            text.detach()
+            if compress:
+                binary.close()
+            if self.format == 'zip':
+                raw.close()
+
+        # A tar only gets the page once it is complete
+        if self.format != 'zip':
+            with raw:
+                info = tarfile.TarInfo(name)
+                info.size = raw.tell()
+                info.mtime = time.time()
+                raw.seek(0)
+                self.archive.addfile(info, raw)
+
+    def add_file(self, source, link):
+        """Add a file the pages link to as link; returns False if it was skipped"""
+        name = self.member_name(link)
+        if name is None or not self._claim(name):
+            return False
+        if self.format == 'zip':
+            stored = name.lower().endswith(STORED_EXTENSIONS)
+            self.archive.write(source, name, zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+        else:
+            self.archive.add(source, arcname=name, recursive=False)
+        return True
+
+    def close(self, keep=True):
+        """Finish the archive (or throw it away when keep is False)"""
+        if self.archive is None:
+            return
+        self.archive.close()
+        self.archive = None
+        if keep:
+            os.replace(self.partial, self.path)
+        elif os.path.exists(self.partial):
+            os.remove(self.partial)
+
+def open_site_archive(output_file, archive_format=OUTPUT_ARCHIVE):
+    """The SiteArchive for a blog that would be saved as output_file"""
+    if archive_format not in ARCHIVE_EXTENSIONS:
+        raise ValueError(f"OUTPUT_ARCHIVE must be one of {', '.join(ARCHIVE_EXTENSIONS)}, not {archive_format!r}")
+    return SiteArchive(get_site_archive_filename(output_file, ARCHIVE_EXTENSIONS[archive_format]), archive_format)
+
+def add_site_media(archive):
+    """
+    Copy the photos and videos the blog links to into the archive, straight
+    from where they are. Returns (files added, files that can't be reached
+    from the pages' folder).
+    """
+    files = []
+    if DEDUPLICATE_MEDIA:
+        # One copy of each, under the names media_store.py gave them
+        for name, media_path in stored_files().items():
+            files.append((os.path.join(MEDIA_DIR, media_path), f"{RELATIVE_DEDUP_MEDIA_PATH}/{name}"))
+    else:
+        if not FIX_MEDIA_PATHS:
+            build_media_index()
+        for media_path in media_files():
+            files.append((os.path.join(MEDIA_DIR, media_path), f"{RELATIVE_MEDIA_PATH}/{media_path}"))
+
+    # Smaller copies of the photos, as listed by media_variants.py
+    if responsive_images_enabled():
+        for variant in variant_files():
+            if os.path.exists(os.path.join(IMAGE_VARIANTS_DIR, variant)):
+                files.append((os.path.join(IMAGE_VARIANTS_DIR, variant), f"{RELATIVE_IMAGE_VARIANTS_PATH}/{variant}"))
+
+    added = outside = 0
+    for source, link in files:
+        if archive.member_name(link) is None:
+            outside += 1
+        elif archive.add_file(source, link):
+            added += 1
+    return added, outside
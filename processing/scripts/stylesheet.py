@@ -0,0 +1,145 @@
+"""
+Shared, trimmed Facebook stylesheet
+
+Facebook's export comes with a big stylesheet, and it used to be pasted
+into every page. Instead, UsedSelectors notes which classes, ids and tags
+the finished posts actually use, prune_css keeps only the rules that can
+match them (minified), and write_stylesheet saves the result as one .css
+file that every page links to, so the browser downloads it once.
+"""
+
+import re
+
+from blog_writer import open_output
+
+COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+QUOTED = re.compile(r'''("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')''')
+
+# Used to find what the posts use
+CLASS_ATTRIBUTE = re.compile(r'\bclass="([^"]*)"')
+ID_ATTRIBUTE = re.compile(r'\bid="([^"]*)"')
+TAG_NAME = re.compile(r'<([a-zA-Z][\w-]*)')
+
+# Parts of a selector
+SELECTOR_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+SELECTOR_ID = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+SELECTOR_TAG = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)')
+PSEUDO_AND_ATTRIBUTE = re.compile(r'::?[\w-]+(?:\([^)]*\))?|\[[^\]]*\]')
+
+# Tags every page has, even if no post contains them
+PAGE_TAGS = {'html', 'body', 'head', 'div', 'main'}
+
+# @-rules whose inside is more rules (pruned too); other @-rules are kept whole
+NESTED_AT_RULES = ('@media', '@supports', '@document')
+
+class UsedSelectors:
+    """The classes, ids and tags found in the HTML given to add_html"""
+
+    def __init__(self):
+        self.classes = set()
+        self.ids = set()
+        self.tags = set(PAGE_TAGS)
+
+    def add_html(self, text):
+        for names in CLASS_ATTRIBUTE.findall(text):
+            self.classes.update(names.split())
+        self.ids.update(ID_ATTRIBUTE.findall(text))
+        self.tags.update(name.lower() for name in TAG_NAME.findall(text))
+
+    def matches(self, selector):
+        """False when the selector needs a class, id or tag that is never used"""
+        simple = PSEUDO_AND_ATTRIBUTE.sub('', selector)
+        return (all(name in self.classes for name in SELECTOR_CLASS.findall(simple))
+                and all(name in self.ids for name in SELECTOR_ID.findall(simple))
+                and all(name.lower() in self.tags for name in SELECTOR_TAG.findall(simple)))
+
+def _squeeze(text, punctuation):
+    """Collapse whitespace and drop it around punctuation (but not inside quotes)"""
+    parts = QUOTED.split(text)
+    for number in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[number])
+        parts[number] = re.sub(rf'\s*([{re.escape(punctuation)}])\s*', r'\1', part)
+    return ''.join(parts).strip()
+
+def _minify_declarations(body):
+    return _squeeze(body, ':;,{}').replace(';}', '}').rstrip(';')
+
+def _split_selectors(prelude):
+    """Split "a, b:not(.c, .d)" on the commas that separate selectors"""
+    selectors = []
+    depth = 0
+    start = 0
+    for position, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:position])
+            start = position + 1
+    selectors.append(prelude[start:])
+    return [selector.strip() for selector in selectors if selector.strip()]
+
+def _blocks(css):
+    """Yield (prelude, body) for each rule; body is None for statements like @import"""
+    position = 0
+    length = len(css)
+    while position < length:
+        opening = css.find('{', position)
+        prelude = css[position:opening] if opening != -1 else css[position:]
+
+        # Statements ending in ";" (@charset, @import) come before the next block
+        while ';' in prelude:
+            statement, prelude = prelude.split(';', 1)
+            if statement.strip():
+                yield statement.strip() + ';', None
+        if opening == -1:
+            return
+
+        # Find the matching closing brace
+        depth = 1
+        quote = None
+        end = opening + 1
+        while end < length and depth:
+            char = css[end]
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in '"\'':
+                quote = char
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            end += 1
+
+        yield prelude.strip(), css[opening + 1:end - 1]
+        position = end
+
+def prune_css(css, used):
+    """Minified css with only the rules that can match something in used"""
+    output = []
+    for prelude, body in _blocks(COMMENT.sub('', css)):
+        if body is None:
+            output.append(_squeeze(prelude, ';,'))
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = prune_css(body, used)
+            if inner:
+                output.append(f"{_squeeze(prelude, ':,')}{{{inner}}}")
+        elif prelude.startswith('@'):
+            output.append(f"{_squeeze(prelude, ',')}{{{_minify_declarations(body)}}}")
+        else:
+            declarations = _minify_declarations(body)
+            selectors = [_squeeze(selector, '>+~,') for selector in _split_selectors(prelude) if used.matches(selector)]
+            # Empty rules do nothing
+            if selectors and declarations:
+                output.append(f"{','.join(selectors)}{{{declarations}}}")
+    return ''.join(output)
+
+def write_stylesheet(path, original_css, used, compress=False, archive=None):
+    """Save the trimmed stylesheet; returns (original size, trimmed size) in characters"""
+    pruned = prune_css(original_css, used)
+    with open_output(path, compress, archive) as out:
+        out.write(pruned)
+        out.write('\n')
+    return len(original_css), len(pruned)
@@ -0,0 +1,96 @@
+"""
+Blog post titles for Facebook Export to Blog Converter
+
+Turns a post's text or photo caption into a clean title and a URL-safe
+slug. All Facebook clutter terms are compiled into one pattern when the
+engine is built, and results are remembered, so captions that repeat on
+thousands of posts ("Mobile uploads", ...) are only worked out once.
+"""
+
+import html
+import re
+from functools import lru_cache
+
+from config import *
+
+# Used by extract_first_sentence
+HTML_TAG = re.compile(r'<[^>]+>')
+SENTENCE_END = re.compile(r'[.!?]|\n')
+
+# Tidying up after the clutter is gone
+EDGE_SEPARATORS = re.compile(r'^[-\s_]+|[-\s_]+$')
+REPEATED_SEPARATORS = re.compile(r'[-\s_]{2,}')
+
+# Slug (filename-safe) version of a title
+SLUG_UNSAFE = re.compile(r'[^\w\s-]')
+SLUG_SEPARATORS = re.compile(r'[-\s]+')
+
+# Facebook also writes "Mobile uploads" in a few odd ways (removed after the clutter terms)
+MOBILE_UPLOADS = re.compile(r'(Mobile[-\s]*uploads?\s*)+', re.IGNORECASE)
+
+def extract_first_sentence(text):
+    """Extract first sentence from text, limit to 40 chars"""
+    if not text:
+        return ""
+
+    # Remove HTML tags and decode entities
+    text = HTML_TAG.sub('', text)
+    text = html.unescape(text)
+    text = text.strip()
+
+    if not text:
+        return ""
+
+    # Find first sentence (end with ., !, ?, or line break)
+    first_sentence = SENTENCE_END.split(text, 1)[0].strip()
+
+    # Limit to 40 characters
+    if len(first_sentence) > 40:
+        return first_sentence[:37] + "..."
+
+    return first_sentence
+
+class TitleEngine:
+    """Cleans titles and makes slugs using one precompiled clutter pattern"""
+
+    def __init__(self, clutter_terms=FACEBOOK_CLUTTER_TERMS, max_length=MAX_TITLE_LENGTH, cache_size=4096):
+        # Every spelling of every term (spaces and hyphens swapped), longest first
+        # so "Timeline photos" wins over "Timeline"
+        variants = set()
+        for term in clutter_terms:
+            variants.update([term, term.replace(' ', '-'), term.replace('-', ' ')])
+        alternatives = [re.escape(variant) for variant in sorted(variants, key=len, reverse=True) if variant]
+
+        self.clutter = re.compile('|'.join(alternatives), re.IGNORECASE)
+        self.max_length = max_length
+        self.clean_title = lru_cache(maxsize=cache_size)(self._clean_title)
+        self.title_and_slug = lru_cache(maxsize=cache_size)(self._title_and_slug)
+
+    def _clean_title(self, title):
+        """Remove clutter terms and tidy up dashes and spaces"""
+        if not title:
+            return title
+        title = self.clutter.sub('', title)
+        title = MOBILE_UPLOADS.sub('', title)
+        title = EDGE_SEPARATORS.sub('', title)
+        return REPEATED_SEPARATORS.sub('-', title)
+
+    def _title_and_slug(self, raw_title):
+        """Return (title, slug): the cleaned, shortened title and its filename-safe form"""
+        title = self.clean_title(raw_title)
+
+        # Limit title length if configured
+        if len(title) > self.max_length:
+            title = title[:self.max_length].rsplit(' ', 1)[0] + '...'
+
+        slug = SLUG_SEPARATORS.sub('-', SLUG_UNSAFE.sub('', title).strip())
+        return title, slug
+
+@lru_cache(maxsize=None)
+def get_title_engine():
+    """Shared engine built from config.py (as it is when first asked for)"""
+    return TitleEngine(FACEBOOK_CLUTTER_TERMS, MAX_TITLE_LENGTH)
+
+def clean_title(title):
+    """Clean up title by removing unwanted prefixes and cleaning formatting"""
+    return get_title_engine().clean_title(title)
@@ -0,0 +1,276 @@
+"""
+One-walk cleanup of a post section
+
+Cleaning a post used to search the section many times: once per div for
+clutter labels, once each for images, videos and links, and again for the
+date and captions. Here every step is a small "transform" that says which
+tags it cares about; run_pipeline walks the section once and hands each
+tag to the transforms that want it.
+"""
+
+from collections import defaultdict
+
+from bs4 import CData, NavigableString, Tag
+
+from config import *
+from image_size import image_dimensions
+from media_index import resolve_media_link
+from media_store import stored_media_link
+from media_variants import responsive_image_attrs, responsive_images_enabled
+
+# Strings that count for get_text() (not comments, scripts or styles)
+TEXT_TYPES = (NavigableString, CData)
+
+# The part of Facebook media links we replace with RELATIVE_MEDIA_PATH
+FACEBOOK_MEDIA_PATH = 'your_facebook_activity/posts/media/'
+
+# Which attribute holds the media link for each tag
+MEDIA_ATTRIBUTES = {'img': 'src', 'video': 'src', 'a': 'href'}
+
+class Transform:
+    """
+    One step of the pipeline.
+
+    tags lists the tag names this step wants to see. start() is called when
+    the walk reaches a tag, end() when it leaves it (with the tag's text, or
+    None when the text is longer than the pipeline keeps), and finish() once
+    the whole section has been walked.
+    """
+    tags = ()
+
+    def start(self, tag):
+        pass
+
+    def end(self, tag, text):
+        pass
+
+    def finish(self, result):
+        pass
+
+def has_class(tag, class_name):
+    """True when class_name is one of the tag's classes"""
+    return class_name in (tag.get('class') or ())
+
+def root_of(tag):
+    """The top-most element above tag (divs emptied by ClutterRemover become their own root)"""
+    while tag.parent is not None:
+        tag = tag.parent
+    return tag
+
+def fix_media_link(tag, problems=None):
+    """
+    Point an img/video src or a link href at its file in RELATIVE_MEDIA_PATH.
+    Links whose file is missing (or has the same name as other files) are
+    added to problems as (link, problem).
+    """
+    attribute = MEDIA_ATTRIBUTES[tag.name]
+    link = tag.get(attribute, '')
+    if not link or link.startswith('http'):
+        return None
+
+    # The file itself, found in the index of MEDIA_DIR made by media_index.py
+    media_file, problem = resolve_media_link(link)
+    if problem and problems is not None:
+        problems.append((link, problem))
+    if media_file:
+        tag[attribute] = f"{RELATIVE_MEDIA_PATH}/{media_file}"
+    elif 'your_facebook_activity/posts/media' in link:
+        # Extract the path after "media/"
+        tag[attribute] = f"{RELATIVE_MEDIA_PATH}/{link.split(FACEBOOK_MEDIA_PATH)[-1]}"
+    elif not link.startswith(f'{RELATIVE_MEDIA_PATH}/'):
+        tag[attribute] = f"{RELATIVE_MEDIA_PATH}/{link.split('/')[-1]}"
+
+    # The file's path inside MEDIA_DIR
+    if not tag[attribute].startswith(f'{RELATIVE_MEDIA_PATH}/'):
+        return None
+    media_file = media_file or tag[attribute][len(RELATIVE_MEDIA_PATH) + 1:]
+    
+    # Link the single stored copy instead (when DEDUPLICATE_MEDIA is on)
+    stored = stored_media_link(media_file)
+    if stored:
+        tag[attribute] = stored
+    return media_file
+
+class MediaPathFixer(Transform):
+    """Fixes media links and adds photo sizes, lazy loading and smaller copies"""
+    tags = ('img', 'video', 'a')
+
+    def __init__(self):
+        self.media = {}
+        self.problems = []
+
+    def start(self, tag):
+        media_file = fix_media_link(tag, self.problems) if FIX_MEDIA_PATHS else None
+        if media_file:
+            self.media[media_file] = None
+        if tag.name != 'img':
+            return
+
+        # Size from the photo's file header, so the page doesn't jump while loading
+        if media_file and LAZY_LOAD_IMAGES and not tag.get('width'):
+            size = image_dimensions(media_file)
+            if size:
+                tag['width'], tag['height'] = str(size[0]), str(size[1])
+
+        # Point at the smaller copies made by media_variants.py
+        if media_file and responsive_images_enabled():
+            attrs = responsive_image_attrs(media_file)
+            if attrs:
+                tag.attrs.update(attrs)
+
+        # Only load photos when they scroll into view
+        if LAZY_LOAD_IMAGES:
+            tag['loading'] = 'lazy'
+            tag['decoding'] = 'async'
+
+    def finish(self, result):
+        result['media'] = list(self.media)
+        result['media_problems'] = self.problems
+
+class ClutterRemover(Transform):
+    """Empties divs whose whole text is a Facebook label like "Mobile uploads" """
+    tags = ('div',)
+
+    def __init__(self):
+        self.matches = []
+
+    def end(self, tag, text):
+        if text is not None and text.strip() in FACEBOOK_CLUTTER_TERMS:
+            self.matches.append(tag)
+
+    def finish(self, result):
+        # Only the outermost matching div is emptied (its inner divs go with it)
+        matched = {id(tag) for tag in self.matches}
+        for tag in self.matches:
+            if not any(id(parent) in matched for parent in tag.parents):
+                tag.string = ''
+
+class DateFinder(Transform):
+    """Finds the post date (<div class="_a72d"> inside the first <footer>)"""
+    tags = ('footer', 'div')
+
+    def __init__(self):
+        self.footer = None
+        self.in_footer = False
+        self.date_div = None
+
+    def start(self, tag):
+        if tag.name == 'footer':
+            if self.footer is None:
+                self.footer = tag
+                self.in_footer = True
+        elif self.in_footer and self.date_div is None and has_class(tag, '_a72d'):
+            self.date_div = tag
+
+    def end(self, tag, text):
+        if tag is self.footer:
+            self.in_footer = False
+
+    def finish(self, result):
+        result['date_text'] = self.date_div.get_text().strip() if self.date_div is not None else None
+
+class TextFinder(Transform):
+    """Finds the post text (in <div class="_2pin">) or else a photo caption (<div class="_3-95">)"""
+    tags = ('div',)
+
+    def __init__(self):
+        self.root = None
+        self.content_div = None
+        self.text_divs = []
+        self.caption_divs = []
+
+    def start(self, tag):
+        if self.root is None:
+            self.root = root_of(tag)
+        if self.content_div is not None and tag.parent is self.content_div:
+            self.text_divs.append(tag)
+        if self.content_div is None and has_class(tag, '_2pin'):
+            self.content_div = tag
+        if has_class(tag, '_3-95'):
+            self.caption_divs.append(tag)
+
+    def finish(self, result):
+        # Read the texts only now, after clutter labels were removed
+        result['post_text'] = ""
+        result['caption'] = ""
+
+        # Divs inside an emptied div are gone from the post
+        self.text_divs = [div for div in self.text_divs if root_of(div) is self.root]
+        self.caption_divs = [div for div in self.caption_divs if root_of(div) is self.root]
+
+        # Look for text content in the main content area
+        for div in self.text_divs:
+            text = div.get_text().strip()
+            if text and not text.startswith('Updated '):
+                result['post_text'] = text
+                return
+
+        # If no main text content, look for meaningful photo captions
+        for div in self.caption_divs:
+            caption_text = div.get_text().strip()
+            # Filter out Facebook UI labels and unwanted text
+            if (caption_text and
+                len(caption_text) > 5 and  # Must be more than just a few characters
+                not any(term in caption_text for term in FACEBOOK_CLUTTER_TERMS) and
+                not caption_text.startswith('Click for') and  # Skip video click prompts
+                not caption_text.startswith('Updated ') and  # Skip update timestamps
+                len(caption_text) < 100):  # Not too long to be main content
+                result['caption'] = caption_text
+                return
+
+def _text_limit():
+    """Longest div text worth keeping while walking (clutter terms plus some spaces)"""
+    return max((len(term) for term in FACEBOOK_CLUTTER_TERMS), default=0) + 1024
+
+def run_pipeline(section, transforms):
+    """
+    Walk the section once, calling each transform for the tags it wants.
+    Returns the dict the transforms filled in from finish().
+    """
+    starts = defaultdict(list)
+    ends = defaultdict(list)
+    for transform in transforms:
+        for name in transform.tags:
+            # Only call the hooks a transform actually overrides
+            if type(transform).start is not Transform.start:
+                starts[name].append(transform)
+            if type(transform).end is not Transform.end:
+                ends[name].append(transform)
+
+    limit = _text_limit()
+    for transform in starts.get(section.name, ()):
+        transform.start(section)
+    # Each entry: [tag, iterator over its children, its text so far (None = too long)]
+    stack = [[section, iter(section.contents), '']]
+
+    while stack:
+        frame = stack[-1]
+        child = next(frame[1], None)
+
+        if child is None:
+            stack.pop()
+            tag, _, text = frame
+            for transform in ends.get(tag.name, ()):
+                transform.end(tag, text)
+            # Pass this tag's text up to its parent
+            if stack:
+                parent = stack[-1]
+                if text is None or parent[2] is None or len(parent[2]) + len(text) > limit:
+                    parent[2] = None
+                else:
+                    parent[2] += text
+        elif isinstance(child, Tag):
+            for transform in starts.get(child.name, ()):
+                transform.start(child)
+            stack.append([child, iter(child.contents), ''])
+        elif type(child) in TEXT_TYPES and frame[2] is not None:
+            frame[2] = frame[2] + child if len(frame[2]) + len(child) <= limit else None
+
+    result = {}
+    for transform in transforms:
+        transform.finish(result)
+    return result
+
+def post_transforms():
+    """The transforms used for every post, in the order they finish"""
+    return [MediaPathFixer(), ClutterRemover(), DateFinder(), TextFinder()]
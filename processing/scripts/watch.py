@@ -0,0 +1,262 @@
+"""
+Rebuild the blog while you edit, and show it in the browser
+
+    python3 processing/scripts/create_fb_posts.py --watch
+
+builds the blog once, shows it at http://localhost:WATCH_PORT and then
+looks for changes to config.py, the export files and the folders in
+MEDIA_DIR every WATCH_INTERVAL seconds. After a change the blog is built
+again and the open page reloads itself.
+
+All builds run in this one process, which keeps every section of the
+export in memory with what was worked out for it (post type, date, cleaned
+body, finished post; see SectionMemory in build_cache.py). After a change
+only what depends on it is done again: a new MAX_TITLE_LENGTH only titles
+and renders the posts again, a new photo in the export only builds that
+post, and when neither the media folders nor the media settings changed,
+MEDIA_DIR isn't looked at again (--reuse-media). Changing one of the
+folders in RESTART_SETTINGS starts the preview over in a new process.
+Previews don't touch the post database or what --since-last-run
+remembers (--no-record).
+"""
+
+import glob
+import gzip
+import os
+import re
+import runpy
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+import config
+import create_fb_posts
+from config import *
+from blog_writer import output_path
+from build_cache import SectionMemory
+from classifier import get_post_classifier
+from titles import get_title_engine
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(SCRIPT_DIR, 'config.py')
+
+# The page asks this address for the build number, and reloads when it changes
+BUILD_URL = '/__build'
+
+# Settings that change what the media stages find or make
+MEDIA_SETTINGS = ['MEDIA_DIR', 'CACHE_DIR', 'FIX_MEDIA_PATHS', 'LAZY_LOAD_IMAGES', 'RESPONSIVE_IMAGES',
+                  'IMAGE_WIDTHS', 'IMAGE_VARIANT_FORMAT', 'IMAGE_VARIANT_QUALITY', 'IMAGE_VARIANTS_DIR',
+                  'DEDUPLICATE_MEDIA', 'DEDUP_MEDIA_DIR', 'OUTPUT_ARCHIVE']
+
+# Folders the scripts take as default values when they are loaded; after a
+# change the preview starts over in a new process
+RESTART_SETTINGS = ['MEDIA_DIR', 'CACHE_DIR', 'OUTPUT_DIR', 'IMAGE_VARIANTS_DIR', 'DEDUP_MEDIA_DIR', 'OUTPUT_ARCHIVE']
+
+RELOAD_SCRIPT = """<script>
+(function () {
+  var build = "%d";
+  setInterval(function () {
+    fetch("%s", {cache: "no-store"}).then(function (response) {
+      return response.text();
+    }).then(function (now) {
+      if (now !== build) location.reload();
+    }).catch(function () {});
+  }, 500);
+})();
+</script>
+"""
+
+def read_settings():
+    """The settings in config.py as they are now (not as they were when watching started)"""
+    return runpy.run_path(CONFIG_FILE)
+
+def apply_settings(settings):
+    """
+    Use settings (as read by read_settings) in this process. Every loaded
+    script has its own copy of the settings ("from config import *"), so
+    each copy is replaced, and the shared helpers made from them are made again.
+    """
+    old = {name: value for name, value in vars(config).items() if name.isupper()}
+    new = {name: value for name, value in settings.items() if name.isupper()}
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if not path or os.path.dirname(os.path.abspath(path)) != SCRIPT_DIR:
+            continue
+        names = vars(module)
+        for name, value in new.items():
+            if name in old and names.get(name) is old[name]:
+                names[name] = value
+    vars(config).update(new)
+    get_post_classifier.cache_clear()
+    get_title_engine.cache_clear()
+
+def preview_file(settings):
+    """Where the watched builds save the blog (always the same file)"""
+    return f"{settings['OUTPUT_DIR']}/{settings['OUTPUT_PREFIX']}-preview.html"
+
+def snapshot(settings):
+    """
+    What a build depends on: size and time of config.py and of every export
+    file, and the time of every folder in MEDIA_DIR (which changes when
+    photos are added, removed or renamed). Returns (files, media folders).
+    """
+    paths = [CONFIG_FILE, settings['INPUT_FILE']]
+    part = re.match(r'(.*)_\d+\.html$', settings['INPUT_FILE'])
+    if part:
+        paths += sorted(glob.glob(f"{glob.escape(part.group(1))}_*.html"))
+
+    state = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            state[path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            state[path] = None
+    media = {}
+    for folder, _, _ in os.walk(settings['MEDIA_DIR']):
+        try:
+            media[folder] = os.stat(folder).st_mtime_ns
+        except OSError:
+            media[folder] = None
+    return state, media
+
+def describe_changes(old, new):
+    """A short text naming what changed between two snapshots"""
+    old, new = {**old[0], **old[1]}, {**new[0], **new[1]}
+    changed = sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+    if not changed:
+        return "nothing"
+    more = f" (and {len(changed) - 1} more)" if len(changed) > 1 else ""
+    return f"{os.path.relpath(changed[0])}{more}"
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Serves the project folder; blog pages get a small script that reloads them after each build"""
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == BUILD_URL:
+            self._send(str(self.server.build).encode('utf-8'), 'text/plain')
+        elif path == '/':
+            self.send_response(302)
+            self.send_header('Location', f"/{quote(self.server.page)}")
+            self.end_headers()
+        elif path.endswith(('.html', '.html.gz')):
+            try:
+                with open(self.translate_path(path), 'rb') as f:
+                    page = f.read()
+            except OSError:
+                self.send_error(404)
+                return
+            if path.endswith('.gz'):
+                page = gzip.decompress(page)
+            script = (RELOAD_SCRIPT % (self.server.build, BUILD_URL)).encode('utf-8')
+            if b'</body>' in page:
+                page = page.replace(b'</body>', script + b'</body>', 1)
+            else:
+                page += script
+            self._send(page, 'text/html; charset=utf-8')
+        else:
+            super().do_GET()
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the build output readable
+        pass
+
+def start_server(port, page):
+    """Serve the current folder on localhost:port in the background; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(PreviewHandler, directory=os.getcwd()))
+    server.build = 0
+    server.page = page
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def build(settings, build_options, memory, reuse_media=False):
+    """Build the blog once in this process, saving to the preview file"""
+    if settings.get('OUTPUT_ARCHIVE'):
+        print("⚠️  OUTPUT_ARCHIVE is set, so the preview won't change (set it to None while previewing)")
+    started = time.perf_counter()
+    options = ['--output', preview_file(settings), '--no-record']
+    if reuse_media:
+        options.append('--reuse-media')
+    create_fb_posts.main([*options, *build_options], memory)
+    print(f"⏱️  Built in {time.perf_counter() - started:.2f}s, waiting for changes (Ctrl+C to stop)")
+
+def page_link(settings):
+    """The preview page as a link from the current folder"""
+    page = output_path(preview_file(settings), settings['GZIP_OUTPUT'])
+    return os.path.relpath(page).replace(os.sep, '/')
+
+def start_over(server):
+    """Run the same command again in a new process (this one ends)"""
+    server.shutdown()
+    server.server_close()
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable, *sys.argv])
+
+def watch(build_options=(), port=WATCH_PORT, interval=WATCH_INTERVAL):
+    """
+    Build the blog, serve it on localhost:port and build it again whenever
+    something it depends on changes. build_options are passed on to every
+    build (e.g. ['--since', '2019-01-01']). Runs until Ctrl+C.
+    """
+    settings = read_settings()
+    server = start_server(port, page_link(settings))
+    print(f"👀 Watching config.py, {settings['INPUT_FILE']} and {settings['MEDIA_DIR']}")
+    print(f"🌐 Preview: http://localhost:{port}/")
+    memory = SectionMemory()
+
+    try:
+        seen = snapshot(settings)
+        build(settings, build_options, memory)
+        server.build += 1
+        while True:
+            time.sleep(interval)
+            now = snapshot(settings)
+            if now == seen:
+                continue
+            # Wait until the files stop changing (editors often save in several steps)
+            while True:
+                time.sleep(interval)
+                settled = snapshot(settings)
+                if settled == now:
+                    break
+                now = settled
+            print(f"\n🔄 {describe_changes(seen, now)} changed, building again")
+
+            # config.py may now point at other files
+            old_settings = settings
+            try:
+                settings = read_settings()
+            except Exception as e:
+                # Keep watching the same files, and build again once it is fixed
+                print(f"❌ Can't read config.py: {e}")
+                seen = now
+                continue
+            changed = [name for name in RESTART_SETTINGS if settings.get(name) != old_settings.get(name)]
+            if changed:
+                print(f"🔁 {changed[0]} changed, starting the preview over")
+                start_over(server)
+            apply_settings(settings)
+            server.page = page_link(settings)
+            # The media stages only run again when something they use changed
+            media_unchanged = now[1] == seen[1] and all(
+                settings.get(name) == old_settings.get(name) for name in MEDIA_SETTINGS)
+            seen = snapshot(settings)
+            build(settings, build_options, memory, reuse_media=media_unchanged)
+            server.build += 1
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        server.shutdown()
+        server.server_close()